@@ -14,9 +14,31 @@ from __future__ import with_statement
 __version__ = "1.1"
 
 
-from .core import (
-    BackgroundTaskWorker,
-    BaseTask,  # noqa: F401
-    BaseTaskWorker,
-    BlockingTaskWorker,
-)
+# Public names are resolved on first access so that ``import flask_taskx``
+# stays cheap for enqueue-only processes; APScheduler and peewee are only
+# imported once a worker or a database backend is actually needed.
+_lazy_attributes = {
+    "BackgroundTaskWorker": ".workers",
+    "BaseTask": ".core",
+    "BaseTaskWorker": ".core",
+    "BlockingTaskWorker": ".workers",
+}
+
+__all__ = sorted(_lazy_attributes)
+
+
+def __getattr__(name):
+    if name not in _lazy_attributes:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+    from importlib import import_module
+
+    module = import_module(_lazy_attributes[name], __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
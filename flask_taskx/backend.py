@@ -0,0 +1,100 @@
+# encoding: utf-8
+# app/extensions/scheduler/backend.py
+
+
+class Backend:
+    """Interface of the storage backends of the tasks queue.
+
+    Tasks are handed around as ``Schedule`` objects exposing at least the
+    ``id``, ``automation``, ``payload``, ``scheduled_date``, ``retries``,
+    ``busy``, ``done``, ``output``, ``fail_message``, ``completion_date``,
+    ``claimed_at``, ``started_at``, ``finished_at``, ``profile`` and
+    ``cache_key`` attributes. Every backend must keep these semantics:
+
+    * a task is never returned by ``pop_task`` or ``claim_task`` to two
+      callers, nor before its ``scheduled_date``;
+    * a task failed ``max_retries`` times is not returned again;
+    * ``append_tasks`` enqueues all the given tasks or none of them.
+
+    :param database: the connection object of the backend
+    """
+
+    max_retries = 3
+    blocking = False  # pop_task waits for a task, workers then consume it in a loop
+
+    def __init__(self, database):
+        self.database = database
+
+    def create_tables(self):
+        """Creates the storage of the queue if it does not exist yet."""
+
+        raise NotImplementedError
+
+    def append_task(self, task, payload, scheduled_date=None):
+        """Enqueues a task and returns its ``Schedule``."""
+
+        raise NotImplementedError
+
+    def append_tasks(self, tasks):
+        """Enqueues ``(task, payload, scheduled_date)`` tuples in one batch
+        and returns their ``Schedule`` objects in the same order.
+        """
+
+        raise NotImplementedError
+
+    def pop_task(self):
+        """Claims the due task scheduled the earliest, or returns ``None``."""
+
+        raise NotImplementedError
+
+    def claim_task(self, schedule_id):
+        """Claims the given task if it is still pending, or returns ``None``.
+
+        Stream backends may hand another due task instead, leaving the given
+        one to the next reader of the stream.
+        """
+
+        raise NotImplementedError
+
+    def peek_tasks(self, since, until, limit):
+        """Returns up to ``limit`` pending tasks due within ``(since, until]``."""
+
+        raise NotImplementedError
+
+    def complete_task(self, schedule, result):
+        """Marks a claimed task as done with the given output."""
+
+        raise NotImplementedError
+
+    def pushback_task(self, schedule, fail_message=None):
+        """Releases a claimed task that failed, counting a retry."""
+
+        raise NotImplementedError
+
+    def save_task(
+        self,
+        automation,
+        scheduled_date,
+        completion_date,
+        payload=None,
+        output=None,
+        fail_message=None,
+    ):
+        """Records an execution of a cron or date task."""
+
+        raise NotImplementedError
+
+    def get_cached_task(self, cache_key, since):
+        """Returns the latest task done since the given date with the given
+        cache key, or ``None``.
+        """
+
+        raise NotImplementedError
+
+    def queue_stats(self, since, now=None):
+        """Returns the rows of open tasks and of recent executions per task
+        name, as used by ``BaseTaskWorker.stats``. Open tasks scheduled after
+        ``now`` are counted as delayed, not pending.
+        """
+
+        raise NotImplementedError
@@ -0,0 +1,85 @@
+# encoding: utf-8
+# app/extensions/scheduler/cache.py
+
+import collections
+import hashlib
+import json
+import threading
+import time
+
+
+def cache_key(task, payload):
+    """Returns the cache key of a task execution, a hash of the task name and
+    the canonical JSON encoding of its payload.
+    """
+
+    canonical = json.dumps(
+        [task, payload], sort_keys=True, separators=(",", ":"), default=str
+    )
+
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """In-process LRU cache of task outputs.
+
+    Entries expire after their own ttl and the least recently used ones are
+    evicted once the JSON encoded size of all cached outputs exceeds ``max_size``.
+
+    :param int max_size: maximum size in bytes of the cached outputs
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns a ``(hit, output)`` tuple for the given key."""
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return False, None
+
+            expires_at, size, output = entry
+
+            if expires_at <= time.monotonic():
+                self._discard(key)
+                return False, None
+
+            self._entries.move_to_end(key)
+
+            return True, output
+
+    def set(self, key, output, ttl):
+        try:
+            size = len(json.dumps(output))
+        except (TypeError, ValueError):
+            return
+
+        with self._lock:
+            self._discard(key)
+
+            if ttl <= 0 or size > self.max_size:
+                return
+
+            self._entries[key] = (time.monotonic() + ttl, size, output)
+            self._size += size
+
+            while self._size > self.max_size:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+
+        if entry is not None:
+            self._size -= entry[1]
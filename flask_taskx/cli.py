@@ -3,66 +3,128 @@
 import os
 import click
 import sys
+from importlib import import_module
 from dotenv import load_dotenv
 
-from flask_taskx import BackgroundTaskWorker
-
 _cwd = os.getcwd()
 sys.path.append(_cwd)
 
 # System
 
-@click.command()
-@click.argument('keywords')
-@click.option('--remote', '-r', default='localhost', help='Remote message broker url')
-def taskx_cli(keywords, remote):
 
-    if keywords == "run":
+def _load_app(module):
+    for name in ("app", "application"):
+        app = getattr(module, name, None)
 
-        app = None
+        if app is not None:
+            return app
 
-        dotenv_path = os.path.join(_cwd, '.env')
-        load_dotenv(dotenv_path)
+    for name in ("create_app", "make_app"):
+        factory = getattr(module, name, None)
 
-        flask_app = os.environ.get("FLASK_APP")
+        if factory is not None:
+            return factory()
 
-        if not flask_app:
 
-            try:
-                module = __import__("app")
-            except Exception as e:
-                print(e)
-        else:
+def _load_task_worker(remote=None):
+    dotenv_path = os.path.join(_cwd, '.env')
+    load_dotenv(dotenv_path)
+
+    flask_app = os.environ.get("FLASK_APP")
+
+    if not flask_app:
+
+        try:
+            module = import_module("app")
+        except Exception as e:
+            print(e)
+            return None, None
+    else:
+
+        flask_app = flask_app.replace('.py', '')
+
+        try:
+            module = import_module(flask_app)
+        except Exception as e:
+            print(e)
+            return None, None
+
+    app = _load_app(module)
+
+    if not app:
+        return None, None
+
+    task_worker = getattr(app, "_task_worker", None)
+
+    if task_worker is None:
+        print("Not task worker available")
+        return None, None
+
+    if remote:
+        task_worker.set_database(None)
+        task_worker.set_database_uri(remote)
+        task_worker.create_db()
+
+    return app, task_worker
 
-            flask_app = flask_app.replace('.py', '')
-
-            try:
-                module = __import__(flask_app)
-            except Exception as e:
-                print(e)
-                return
-        
-        attrs = dir(module)
-
-        if "app" in attrs:
-            app = module.app
-        elif "application" in attrs:
-            app = module.application
-        elif "create_app" in attrs:
-            app = module.create_app()
-        elif "make_app" in attrs:
-            app = module.make_app()
-
-        if not app:
+
+def _print_stats(stats):
+    row = "{:<40} {:>8} {:>12} {:>8} {:>10} {:>8} {:>13}"
+
+    print(
+        row.format(
+            "TASK",
+            "PENDING",
+            "OLDEST (s)",
+            "DELAYED",
+            "IN FLIGHT",
+            "FAILED",
+            "FAILURE RATE",
+        )
+    )
+
+    for name in sorted(stats):
+        task_stats = stats[name]
+        age = task_stats["oldest_pending_age"]
+
+        print(
+            row.format(
+                name,
+                task_stats["pending"],
+                "-" if age is None else "{:.1f}".format(age),
+                task_stats["delayed"],
+                task_stats["in_flight"],
+                task_stats["failed"],
+                "{:.1%}".format(task_stats["failure_rate"]),
+            )
+        )
+
+
+@click.command()
+@click.argument('keywords')
+@click.option('--remote', '-r', default=None, help='Remote message broker url')
+@click.option(
+    "--window", "-w", default=3600, help="Seconds of history used for failure rates"
+)
+def taskx_cli(keywords, remote, window):
+
+    if keywords == "inspect":
+
+        app, task_worker = _load_task_worker(remote)
+
+        if not task_worker:
             return
-        
-        app_attrs = dir(app)
 
-        if not "_task_worker" in app_attrs:
-            print("Not task worker available")
+        _print_stats(task_worker.stats(window=window))
+
+    elif keywords == "run":
+
+        app, task_worker = _load_task_worker(remote)
+
+        if not task_worker:
             return
 
-        task_worker = app._task_worker
+        from flask_taskx.workers import BackgroundTaskWorker
 
         if isinstance(task_worker, BackgroundTaskWorker):
             task_worker.start()
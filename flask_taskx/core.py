@@ -1,16 +1,43 @@
 # encoding: utf-8
 # app/extensions/scheduler/worker.py
 
+import contextlib
 import datetime
+import random
+import threading
+import time
+from importlib import import_module
 
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.schedulers.blocking import BlockingScheduler
-from peewee import MySQLDatabase, PostgresqlDatabase, SqliteDatabase
-from playhouse.db_url import connect
+from .profiling import PROFILE_CPROFILE, PROFILE_TRACEMALLOC, profiled
 
 TASKER_DATABASE_URI = "TASKER_DATABASE_URI"
 TASKER_DRIVER = "TASKER_DRIVER"
 TASKER_INTERVAL_TIME = "TASKER_INTERVAL_TIME"
+TASKER_PROFILER = "TASKER_PROFILER"
+TASKER_PROFILE_RATE = "TASKER_PROFILE_RATE"
+TASKER_CACHE_BACKEND = "TASKER_CACHE_BACKEND"
+TASKER_CACHE_SIZE = "TASKER_CACHE_SIZE"
+TASKER_LOOKAHEAD_TIME = "TASKER_LOOKAHEAD_TIME"
+TASKER_LOOKAHEAD_SIZE = "TASKER_LOOKAHEAD_SIZE"
+TASKER_ENQUEUE_MODE = "TASKER_ENQUEUE_MODE"
+TASKER_SQLITE_WRITER = "TASKER_SQLITE_WRITER"
+TASKER_SQLITE_WRITER_QUEUE_SIZE = "TASKER_SQLITE_WRITER_QUEUE_SIZE"
+TASKER_REDIS_CLAIM_IDLE_TIME = "TASKER_REDIS_CLAIM_IDLE_TIME"
+
+CACHE_MEMORY = "memory"
+CACHE_DATABASE = "database"
+
+# Backend module of each driver, every module provides a ``connect``
+# function and the ``backend_class`` implementing ``backend.Backend``.
+DRIVERS = {
+    "mysql": ".sql.mysql",
+    "postgres": ".sql.postgres",
+    "redis": ".stream.redis",
+    "sqlite": ".sql.sqlite",
+}
+
+ENQUEUE_IMMEDIATE = "immediate"
+ENQUEUE_REQUEST = "request"
 
 
 class NoneDatabaseURIException(Exception):
@@ -24,12 +51,16 @@ class NoneDatabaseURIException(Exception):
 class _TaskManager:
     def __init__(self):
         self.tasks = {}
+        self.cache_ttls = {}
         self.crons = []
         self.dates = []
 
-    def append(self, f, name):
+    def append(self, f, name, cache_ttl=None):
         self.tasks[name] = f
 
+        if cache_ttl:
+            self.cache_ttls[name] = cache_ttl
+
     def run(self, name, payload):
         f = self.tasks[name]
         result = f(**payload)
@@ -72,6 +103,28 @@ class BaseTask:
 
         self._scheduler._append_task(self._name, payload)
 
+    def apply_at(self, when, payload):
+        """Function to schedule a deferred function execution at a given time.
+
+        :param datetime when: the date/time to run the task at, naive datetimes are taken as UTC.
+        :param payload: a dictionary holding the param names as key and param values as value.
+        """
+
+        if when.tzinfo is not None:
+            when = when.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+        self._scheduler._append_task(self._name, payload, scheduled_date=when)
+
+    def apply_in(self, seconds, payload):
+        """Function to schedule a deferred function execution after a delay.
+
+        :param float seconds: seconds to wait before running the task.
+        :param payload: a dictionary holding the param names as key and param values as value.
+        """
+
+        when = datetime.datetime.utcnow() + datetime.timedelta(seconds=seconds)
+        self._scheduler._append_task(self._name, payload, scheduled_date=when)
+
 
 class BaseTaskWorker:
     def __init__(self):
@@ -79,11 +132,27 @@ class BaseTaskWorker:
         self._handler = None
         self._app = None
         self._db = None
+        self._bound_database = None
         self.config = {
             TASKER_DATABASE_URI: "",
             TASKER_DRIVER: "",
             TASKER_INTERVAL_TIME: 5,
+            TASKER_PROFILER: "",
+            TASKER_PROFILE_RATE: 0,
+            TASKER_CACHE_BACKEND: CACHE_MEMORY,
+            TASKER_CACHE_SIZE: 16 * 1024 * 1024,  # 16MB
+            TASKER_LOOKAHEAD_TIME: 60,
+            TASKER_LOOKAHEAD_SIZE: 1000,
+            TASKER_ENQUEUE_MODE: ENQUEUE_IMMEDIATE,
+            TASKER_SQLITE_WRITER: False,
+            TASKER_SQLITE_WRITER_QUEUE_SIZE: 10000,
+            TASKER_REDIS_CLAIM_IDLE_TIME: 5 * 60,
         }
+        self._local = threading.local()
+        self._timers = {}
+        self._timers_lock = threading.Lock()
+        self._timers_enabled = False
+        self._cache = None
 
     def init_app(self, app):
         self._app = app
@@ -94,8 +163,56 @@ class BaseTaskWorker:
             interval_time = int(self._app.config[TASKER_INTERVAL_TIME])
             self.set_interval_time(interval_time)
 
+        if TASKER_ENQUEUE_MODE in self._app.config:
+            self.set_enqueue_mode(self._app.config[TASKER_ENQUEUE_MODE])
+
+        if self.config[TASKER_ENQUEUE_MODE] == ENQUEUE_REQUEST:
+            app.before_request(self._open_request_outbox)
+            app.after_request(self._discard_failed_request_outbox)
+            app.teardown_request(self._flush_request_outbox)
+
+        if TASKER_LOOKAHEAD_TIME in self._app.config:
+            self.config[TASKER_LOOKAHEAD_TIME] = int(
+                self._app.config[TASKER_LOOKAHEAD_TIME]
+            )
+
+        if TASKER_LOOKAHEAD_SIZE in self._app.config:
+            self.config[TASKER_LOOKAHEAD_SIZE] = int(
+                self._app.config[TASKER_LOOKAHEAD_SIZE]
+            )
+
+        if TASKER_PROFILER in self._app.config:
+            self.set_profiler(
+                self._app.config[TASKER_PROFILER],
+                self._app.config.get(TASKER_PROFILE_RATE, 0),
+            )
+
+        if (
+            TASKER_CACHE_BACKEND in self._app.config
+            or TASKER_CACHE_SIZE in self._app.config
+        ):
+            self.set_cache(
+                self._app.config.get(TASKER_CACHE_BACKEND, CACHE_MEMORY),
+                int(
+                    self._app.config.get(
+                        TASKER_CACHE_SIZE, self.config[TASKER_CACHE_SIZE]
+                    )
+                ),
+            )
+
     def run_job(self, job, payload):
-        result = self._manager.run(job, payload)
+        # Imported here, blinker is only needed by processes running tasks.
+        from .signals import task_failure, task_postrun, task_prerun
+
+        task_prerun.send(self, task=job, payload=payload)
+
+        try:
+            result = self._manager.run(job, payload)
+        except Exception as e:
+            task_failure.send(self, task=job, payload=payload, exception=e)
+            raise
+
+        task_postrun.send(self, task=job, payload=payload, result=result)
 
         return result
 
@@ -108,8 +225,157 @@ class BaseTaskWorker:
     def set_driver(self, driver):
         self.config[TASKER_DRIVER] = driver
 
-    def _append_task(self, task, payload):
-        self._db.append_task(task, payload)
+    def set_database(self, database):
+        """Binds the queue to a database connection of the application
+        instead of connecting to **TASKER_DATABASE_URI**, to be called before
+        ``init_app``. Tasks enqueued within a transaction of this database
+        are committed or rolled back with it.
+
+        :param database: a peewee ``Database`` of the configured driver, or
+            ``None`` to connect to **TASKER_DATABASE_URI** again.
+        """
+
+        self._bound_database = database
+
+    def set_enqueue_mode(self, mode):
+        if mode not in (ENQUEUE_IMMEDIATE, ENQUEUE_REQUEST):
+            raise ValueError("Unknown enqueue mode: {}".format(mode))
+
+        self.config[TASKER_ENQUEUE_MODE] = mode
+
+    @contextlib.contextmanager
+    def outbox(self):
+        """Context manager that buffers the tasks applied within the block and
+        enqueues them all in one batched insert when the block exits. If the
+        block raises, the buffered tasks are discarded.
+
+        Nested blocks, or blocks within a request when **TASKER_ENQUEUE_MODE**
+        is ``"request"``, join the outer buffer.
+        """
+
+        if getattr(self._local, "outbox", None) is not None:
+            yield
+            return
+
+        self._local.outbox = []
+        try:
+            yield
+            tasks = self._local.outbox
+        finally:
+            self._local.outbox = None
+
+        if tasks:
+            self._append_tasks(tasks)
+
+    def _open_request_outbox(self):
+        self._local.outbox = []
+
+    def _discard_failed_request_outbox(self, response):
+        # Errors turned into responses by error handlers, abort() included,
+        # reach the teardown without an exception.
+        if response.status_code >= 400:
+            self._local.outbox = None
+
+        return response
+
+    def _flush_request_outbox(self, exc):
+        tasks = getattr(self._local, "outbox", None)
+        self._local.outbox = None
+
+        if exc is None and tasks:
+            self._append_tasks(tasks)
+
+    def set_profiler(self, profiler, rate):
+        """Enables the sampling profiler for task executions.
+
+        :param str profiler: ``"cprofile"``, ``"tracemalloc"`` or ``""`` to disable it.
+        :param float|dict rate: fraction of executions to profile, either for
+            every task or as a dictionary mapping task names to fractions.
+        """
+
+        if profiler not in ("", None, PROFILE_CPROFILE, PROFILE_TRACEMALLOC):
+            raise ValueError("Unknown profiler: {}".format(profiler))
+
+        self.config[TASKER_PROFILER] = profiler
+        self.config[TASKER_PROFILE_RATE] = rate
+
+    def set_cache(self, backend, size):
+        """Configures the result cache of tasks defined with ``cache_ttl``.
+
+        :param str backend: ``"memory"`` for an in-process cache only, or
+            ``"database"`` to also share cached outputs through the tasks table.
+        :param int size: maximum size in bytes of the in-process cache.
+        """
+
+        if backend not in (CACHE_MEMORY, CACHE_DATABASE):
+            raise ValueError("Unknown cache backend: {}".format(backend))
+
+        self.config[TASKER_CACHE_BACKEND] = backend
+        self.config[TASKER_CACHE_SIZE] = size
+        self._cache = None
+
+    def _result_cache(self):
+        # ``cache`` hashes and encodes payloads, it is only imported once a
+        # task defined with ``cache_ttl`` runs.
+        if self._cache is None:
+            from .cache import ResultCache
+
+            self._cache = ResultCache(self.config[TASKER_CACHE_SIZE])
+
+        return self._cache
+
+    def _cache_lookup(self, key, ttl):
+        hit, output = self._result_cache().get(key)
+
+        if hit or self.config[TASKER_CACHE_BACKEND] != CACHE_DATABASE:
+            return hit, output
+
+        now = datetime.datetime.utcnow()
+        cached = self._db.get_cached_task(key, now - datetime.timedelta(seconds=ttl))
+
+        if not cached:
+            return False, None
+
+        remaining = ttl - (now - cached.completion_date).total_seconds()
+        self._result_cache().set(key, cached.output, remaining)
+
+        return True, cached.output
+
+    def _sample_profiler(self, task):
+        profiler = self.config[TASKER_PROFILER]
+        rate = self.config[TASKER_PROFILE_RATE]
+
+        if isinstance(rate, dict):
+            rate = rate.get(task, 0)
+
+        if not profiler or random.random() >= float(rate):
+            return None
+
+        return profiler
+
+    def _append_task(self, task, payload, scheduled_date=None):
+        outbox = getattr(self._local, "outbox", None)
+
+        if outbox is not None:
+            outbox.append((task, payload, scheduled_date))
+            return
+
+        schedule = self._db.append_task(task, payload, scheduled_date=scheduled_date)
+
+        if scheduled_date and self._timers_enabled:
+            self._track_due_tasks([schedule])
+
+    def _append_tasks(self, tasks):
+        schedules = self._db.append_tasks(tasks)
+
+        if self._timers_enabled:
+            self._track_due_tasks(
+                [
+                    schedule
+                    for schedule, (_, _, scheduled_date) in zip(schedules, tasks)
+                    if scheduled_date
+                ]
+            )
 
     def _define_task(self, name):
         def outter(f):
@@ -121,21 +387,30 @@ class BaseTaskWorker:
 
         return outter
 
-    def define_task(self, f):
+    def define_task(self, f=None, cache_ttl=None):
         """Decorator function to define tasks within the context of Flask.
         It returns an instance of a BaseTask class than can be appliable for 
         later executions.
 
+        It can be used bare or called with options, like
+        ``@task_worker.define_task(cache_ttl=60)``.
+
         :param f: a function to be decorated, this function will be used
         for tasks execution.
+        :param int cache_ttl: seconds the output of the task is reused for
+        later executions with an identical payload, only meant for tasks
+        whose output depends solely on their payload.
 
         :return: [BaseTask]
         """
 
+        if f is None:
+            return lambda f: self.define_task(f, cache_ttl=cache_ttl)
+
         def inner():
             name = "{module}.{name}".format(module=f.__module__, name=f.__name__)
             task = BaseTask(name, self)
-            self._manager.append(f, name)
+            self._manager.append(f, name, cache_ttl=cache_ttl)
             return task
 
         return inner()
@@ -182,6 +457,57 @@ class BaseTaskWorker:
 
         return inner()
 
+    def stats(self, window=3600):
+        """Returns the state of the tasks queue per task name.
+
+        Each task name maps to a dictionary with the number of ``pending``
+        (due), ``delayed`` (scheduled later), ``in_flight`` and ``failed``
+        (out of retries) tasks, the ``oldest_pending_age`` in seconds and the
+        ``failure_rate`` of the executions finished in the last ``window``
+        seconds.
+
+        :param int window: seconds of execution history used for the failure rate.
+
+        :return: [dict]
+        """
+
+        now = datetime.datetime.utcnow()
+        open_rows, recent_rows = self._db.queue_stats(
+            now - datetime.timedelta(seconds=window), now
+        )
+
+        stats = {}
+
+        for row in open_rows:
+            oldest_pending = row["oldest_pending"]
+            stats[row["automation"]] = {
+                "pending": int(row["pending"] or 0),
+                "oldest_pending_age": (now - oldest_pending).total_seconds()
+                if oldest_pending
+                else None,
+                "delayed": int(row["delayed"] or 0),
+                "in_flight": int(row["in_flight"] or 0),
+                "failed": int(row["failed"] or 0),
+                "failure_rate": 0.0,
+            }
+
+        for row in recent_rows:
+            failures = int(row["failures"] or 0)
+            attempts = failures + int(row["successes"] or 0)
+            task_stats = stats.setdefault(
+                row["automation"],
+                {
+                    "pending": 0,
+                    "oldest_pending_age": None,
+                    "delayed": 0,
+                    "in_flight": 0,
+                    "failed": 0,
+                },
+            )
+            task_stats["failure_rate"] = failures / attempts if attempts else 0.0
+
+        return stats
+
     def get_crons(self):
         return self._manager.crons
 
@@ -190,48 +516,39 @@ class BaseTaskWorker:
 
     def create_db(self):
         driver = self.config[TASKER_DRIVER]
-        database_uri = self.config[TASKER_DATABASE_URI]
 
-        if not database_uri:
-            try:
-                database_uri = self._app.config["SQLALCHEMY_DATABASE_URI"]
-            except:
-                raise NoneDatabaseURIException
-
-        if driver == "postgres":
-            from .sql import postgres as database
-
-            db = connect(database_uri)
-
-        elif driver == "mysql":
-            from .sql import mysql as database
-
-            database_uri = database_uri.replace("mysql+pymysql", "mysql")
-            db = connect(database_uri)
-
-        elif driver == "sqlite":
-            from .sql import sqlite as database
-
-            database_uri = database_uri.replace("\\", "/")
-            database_uri = database_uri.replace("sqlite:///", "")
-            db = SqliteDatabase(
-                database_uri,
-                pragmas={
-                    "journal_mode": "wal",
-                    "journal_size_limit": 1024,
-                    "cache_size": -1024 * 64,  # 64MB
-                    "foreign_keys": 1,
-                    "ignore_check_constraints": 0,
-                    "synchronous": 0,
-                },
-            )
+        if driver not in DRIVERS:
+            raise ValueError("Unknown driver: {}".format(driver))
+
+        database = import_module(DRIVERS[driver], __package__)
+
+        if self._bound_database is not None:
+            db = self._bound_database
+        else:
+            database_uri = self.config[TASKER_DATABASE_URI]
+
+            if not database_uri:
+                try:
+                    database_uri = self._app.config["SQLALCHEMY_DATABASE_URI"]
+                except:
+                    raise NoneDatabaseURIException
+
+            db = database.connect(database_uri)
 
-        self._db = database
-        self._db.proxy.initialize(db)
+        self._db = database.backend_class(db, **self._backend_options(driver))
         self._database = db
 
+    def _backend_options(self, driver):
+        if driver == "sqlite" and self.config[TASKER_SQLITE_WRITER]:
+            return {"writer_queue_size": self.config[TASKER_SQLITE_WRITER_QUEUE_SIZE]}
+
+        if driver == "redis":
+            return {"claim_idle_time": self.config[TASKER_REDIS_CLAIM_IDLE_TIME]}
+
+        return {}
+
     def create_tables(self):
-        self._database.create_tables([self._db.Schedule])
+        self._db.create_tables()
 
     def date_executor(self, f):
         def wrapper():
@@ -275,22 +592,133 @@ class BaseTaskWorker:
 
     def task_executor(self):
         with self._app.app_context():
-            now = datetime.datetime.utcnow()
             schedule = self._db.pop_task()
 
             if not schedule:
                 return
 
-            if now < schedule.scheduled_date:
-                return
+            self._process(schedule)
+
+    def task_consumer(self):
+        """Runs the tasks as they are enqueued, for backends whose
+        ``pop_task`` waits for a task to arrive instead of returning at once.
+        """
+
+        while self.running:
             try:
-                automation = schedule.automation
-                payload = schedule.payload
+                self.task_executor()
+            except Exception:
+                # The queue is unreachable, wait before trying again.
+                time.sleep(self.config[TASKER_INTERVAL_TIME])
+
+    def due_task_loader(self):
+        """Loads the tasks due within the look-ahead time and sets a timer for
+        each of them, so they run as soon as they are due instead of waiting
+        for the next interval of the task executor.
+        """
+
+        now = datetime.datetime.utcnow()
+        until = now + datetime.timedelta(seconds=self.config[TASKER_LOOKAHEAD_TIME])
+
+        with self._app.app_context():
+            schedules = self._db.peek_tasks(
+                now, until, self.config[TASKER_LOOKAHEAD_SIZE]
+            )
 
-                result = self.run_job(automation, payload)
-                self._db.complete_task(schedule, result)
-            except Exception as e:
-                self._db.pushback_task(schedule, str(e))
+        with self._timers_lock:
+            for schedule_id, due_date in list(self._timers.items()):
+                if due_date <= now:
+                    del self._timers[schedule_id]
+
+        self._track_due_tasks(schedules)
+
+    def due_task_executor(self, schedule_id):
+        with self._timers_lock:
+            self._timers.pop(schedule_id, None)
+
+        with self._app.app_context():
+            schedule = self._db.claim_task(schedule_id)
+
+            if not schedule:
+                return
+
+            self._process(schedule)
+
+    def _track_due_tasks(self, schedules):
+        until = datetime.datetime.utcnow() + datetime.timedelta(
+            seconds=self.config[TASKER_LOOKAHEAD_TIME]
+        )
+
+        with self._timers_lock:
+            for schedule in schedules:
+                if len(self._timers) >= self.config[TASKER_LOOKAHEAD_SIZE]:
+                    return
+
+                if schedule.id in self._timers or schedule.scheduled_date > until:
+                    continue
+
+                self._timers[schedule.id] = schedule.scheduled_date
+                self.add_job(
+                    self.due_task_executor,
+                    "date",
+                    run_date=schedule.scheduled_date.replace(
+                        tzinfo=datetime.timezone.utc
+                    ),
+                    args=[schedule.id],
+                    misfire_grace_time=None,
+                )
+
+    def _process(self, schedule):
+        try:
+            automation = schedule.automation
+            payload = schedule.payload
+            cache_ttl = self._manager.cache_ttls.get(automation)
+            hit = False
+
+            if cache_ttl:
+                from .cache import cache_key
+
+                key = cache_key(automation, payload)
+                hit, result = self._cache_lookup(key, cache_ttl)
+
+            if hit:
+                schedule.started_at = schedule.finished_at = datetime.datetime.utcnow()
+            else:
+                result = self._execute(schedule)
+
+                # Only executions carry the cache key, so a cached output
+                # expires ``cache_ttl`` after it was computed however often
+                # it is reused.
+                if cache_ttl:
+                    schedule.cache_key = key
+                    self._result_cache().set(key, result, cache_ttl)
+
+            self._db.complete_task(schedule, result)
+        except Exception as e:
+            self._db.pushback_task(schedule, str(e))
+
+    def _execute(self, schedule):
+        automation = schedule.automation
+        profiler = self._sample_profiler(automation)
+
+        profile = {}
+        try:
+            with contextlib.ExitStack() as stack:
+                # Profiling is best effort, it must never fail nor re-run a task.
+                try:
+                    profile = stack.enter_context(profiled(profiler))
+                except Exception:
+                    pass
+
+                schedule.started_at = datetime.datetime.utcnow()
+                try:
+                    result = self.run_job(automation, schedule.payload)
+                finally:
+                    schedule.finished_at = datetime.datetime.utcnow()
+        finally:
+            schedule.profile = profile or None
+
+        return result
 
     def initialize_db(
         self,
@@ -301,9 +729,39 @@ class BaseTaskWorker:
         if TASKER_DRIVER in self._app.config:
             self.set_driver(self._app.config[TASKER_DRIVER])
 
+        if TASKER_SQLITE_WRITER in self._app.config:
+            self.config[TASKER_SQLITE_WRITER] = bool(
+                self._app.config[TASKER_SQLITE_WRITER]
+            )
+
+        if TASKER_SQLITE_WRITER_QUEUE_SIZE in self._app.config:
+            self.config[TASKER_SQLITE_WRITER_QUEUE_SIZE] = int(
+                self._app.config[TASKER_SQLITE_WRITER_QUEUE_SIZE]
+            )
+
+        if TASKER_REDIS_CLAIM_IDLE_TIME in self._app.config:
+            self.config[TASKER_REDIS_CLAIM_IDLE_TIME] = float(
+                self._app.config[TASKER_REDIS_CLAIM_IDLE_TIME]
+            )
+
     def register_task(self):
         interval_time = self.config[TASKER_INTERVAL_TIME]
-        self.add_job(self.task_executor, "interval", seconds=interval_time)
+
+        if self._db.blocking:
+            self.add_job(
+                self.task_consumer,
+                next_run_time=datetime.datetime.now(datetime.timezone.utc),
+            )
+        else:
+            self.add_job(self.task_executor, "interval", seconds=interval_time)
+
+        self.add_job(
+            self.due_task_loader,
+            "interval",
+            seconds=interval_time,
+            next_run_time=datetime.datetime.now(datetime.timezone.utc),
+        )
+        self._timers_enabled = True
 
     def register_crons(self):
         crons = self.get_crons()
@@ -338,61 +796,12 @@ class BaseTaskWorker:
         self.register_dates()
 
 
-class BackgroundTaskWorker(BaseTaskWorker, BackgroundScheduler):
-    """Manages scheduled background tasks
-
-    :param app: Flask instance
-    """
-
-    def __init__(self, app=None):
-        BackgroundScheduler.__init__(self)
-        BaseTaskWorker.__init__(self)
-
-        if app:
-            BaseTaskWorker.init_app(self, app)
+def __getattr__(name):
+    # The scheduler-backed workers live in ``workers`` so that importing
+    # this module does not pull in APScheduler.
+    if name in ("BackgroundTaskWorker", "BlockingTaskWorker"):
+        from . import workers
 
-    def init_app(self, app):
-        """Initializes your tasks settings from the application settings.
-
-        You can use this if you want to set up your BackgroundTaskWorker instance
-        at configuration time.
-
-        :param app: Flask application instance
-        """
-
-        BaseTaskWorker.init_app(self, app)
-        app._task_worker = self
-
-    def start(self):
-        BaseTaskWorker.start(self)
-        BackgroundScheduler.start(self)
-
-
-class BlockingTaskWorker(BaseTaskWorker, BlockingScheduler):
-    """Manages scheduled tasks
-
-    :param app: Flask instance
-    """
+        return getattr(workers, name)
 
-    def __init__(self, app=None):
-        BlockingScheduler.__init__(self)
-        BaseTaskWorker.__init__(self)
-
-        if app:
-            BaseTaskWorker.init_app(self, app)
-
-    def init_app(self, app):
-        """Initializes your tasks settings from the application settings.
-
-        You can use this if you want to set up your BlockingTaskWorker instance
-        at configuration time.
-
-        :param app: Flask application instance
-        """
-
-        BaseTaskWorker.init_app(self, app)
-        app._task_worker = self
-
-    def start(self):
-        BaseTaskWorker.start(self)
-        BlockingScheduler.start(self)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
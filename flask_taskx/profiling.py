@@ -0,0 +1,138 @@
+# encoding: utf-8
+# app/extensions/scheduler/profiling.py
+
+import contextlib
+import threading
+
+PROFILE_CPROFILE = "cprofile"
+PROFILE_TRACEMALLOC = "tracemalloc"
+
+PROFILE_LIMIT = 20
+
+# Only one cProfile profiler can be active at a time on Python 3.12+, a
+# sampled execution overlapping another one is left unprofiled.
+_cprofile_lock = threading.Lock()
+
+# tracemalloc is process wide, it is started by the first profiled
+# execution and stopped by the last one still running.
+_tracemalloc_lock = threading.Lock()
+_tracemalloc = {"users": 0, "owned": False}
+
+
+@contextlib.contextmanager
+def profiled(mode, limit=PROFILE_LIMIT):
+    """Context manager that profiles the enclosed block.
+
+    It yields a dictionary that is filled with the collected statistics once
+    the block exits, even if it raised. When ``mode`` is empty, or the
+    profiler is not available, the block runs unprofiled and the dictionary
+    stays empty. Failures of the profiler itself never propagate.
+
+    :param str mode: ``"cprofile"`` or ``"tracemalloc"``
+    :param int limit: maximum number of entries kept in the statistics
+
+    .. note:: ``tracemalloc`` traces the whole process, allocations made by
+        tasks running concurrently in other threads are reported as well.
+    """
+
+    if mode == PROFILE_CPROFILE:
+        stop = _start_cprofile(limit)
+    elif mode == PROFILE_TRACEMALLOC:
+        stop = _start_tracemalloc(limit)
+    elif not mode:
+        stop = None
+    else:
+        raise ValueError("Unknown profiler mode: {}".format(mode))
+
+    stats = {}
+    try:
+        yield stats
+    finally:
+        if stop:
+            stats.update(stop())
+
+
+def _start_cprofile(limit):
+    import cProfile
+
+    if not _cprofile_lock.acquire(blocking=False):
+        return None
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except Exception:
+        _cprofile_lock.release()
+        return None
+
+    def stop():
+        try:
+            profiler.disable()
+            return _cprofile_stats(profiler, limit)
+        except Exception as e:
+            return {"mode": PROFILE_CPROFILE, "error": str(e)}
+        finally:
+            _cprofile_lock.release()
+
+    return stop
+
+
+def _start_tracemalloc(limit):
+    import tracemalloc
+
+    with _tracemalloc_lock:
+        try:
+            if _tracemalloc["users"] == 0:
+                _tracemalloc["owned"] = not tracemalloc.is_tracing()
+                if _tracemalloc["owned"]:
+                    tracemalloc.start()
+                tracemalloc.reset_peak()
+        except Exception:
+            return None
+
+        _tracemalloc["users"] += 1
+
+    def stop():
+        with _tracemalloc_lock:
+            try:
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                return _tracemalloc_stats(snapshot, peak, limit)
+            except Exception as e:
+                return {"mode": PROFILE_TRACEMALLOC, "error": str(e)}
+            finally:
+                _tracemalloc["users"] -= 1
+                if _tracemalloc["users"] == 0 and _tracemalloc["owned"]:
+                    tracemalloc.stop()
+
+    return stop
+
+
+def _cprofile_stats(profiler, limit):
+    import pstats
+
+    entries = []
+    for (filename, line, function), (_, calls, tottime, cumtime, _) in pstats.Stats(
+        profiler
+    ).stats.items():
+        entries.append(
+            {
+                "function": "{}:{}({})".format(filename, line, function),
+                "calls": calls,
+                "tottime": tottime,
+                "cumtime": cumtime,
+            }
+        )
+
+    entries.sort(key=lambda entry: entry["cumtime"], reverse=True)
+
+    return {"mode": PROFILE_CPROFILE, "entries": entries[:limit]}
+
+
+def _tracemalloc_stats(snapshot, peak, limit):
+    entries = [
+        {"location": str(stat.traceback), "size": stat.size, "count": stat.count}
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+
+    return {"mode": PROFILE_TRACEMALLOC, "peak": peak, "entries": entries}
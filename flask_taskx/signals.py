@@ -0,0 +1,11 @@
+# encoding: utf-8
+# app/extensions/scheduler/signals.py
+
+from blinker import Namespace
+
+# This namespace is only for signals provided by Flask-TaskX itself.
+_signals = Namespace()
+
+task_prerun = _signals.signal("task-prerun")
+task_postrun = _signals.signal("task-postrun")
+task_failure = _signals.signal("task-failure")
@@ -0,0 +1,335 @@
+# encoding: utf-8
+# app/extensions/scheduler/sql/base.py
+
+import copy
+import datetime
+
+from peewee import (
+    BooleanField,
+    Case,
+    CharField,
+    DateTimeField,
+    IntegerField,
+    Model,
+    chunked,
+    fn,
+)
+
+from ..backend import Backend
+
+TABLE_NAME = "flask_tasker_schedule"
+
+BATCH_SIZE = 100
+
+
+def schedule_model(database, json_field, partial_indexes=False):
+    """Returns the ``Schedule`` model of a SQL dialect.
+
+    :param database: the database, or proxy, the model is bound to
+    :param json_field: the JSON field class of the dialect
+    :param bool partial_indexes: index open tasks only, for dialects whose
+        planner can match partial indexes against the queue queries
+    """
+
+    class Schedule(Model):
+        class Meta:
+            db_table = TABLE_NAME
+
+        automation = CharField()
+        scheduled_date = DateTimeField(default=datetime.datetime.utcnow)
+        completion_date = DateTimeField(null=True)
+
+        payload = json_field(null=True)
+        output = json_field(null=True)
+        busy = BooleanField(default=False)
+        done = BooleanField(default=False)
+        retries = IntegerField(default=0)
+        fail_message = json_field(null=True)
+
+        claimed_at = DateTimeField(null=True)
+        started_at = DateTimeField(null=True)
+        finished_at = DateTimeField(null=True, index=True)
+        profile = json_field(null=True)
+        cache_key = CharField(null=True, index=True)
+
+    Schedule._meta.set_database(database)
+
+    # One index serves popping and looking ahead due tasks, the other one
+    # the per task aggregates of the queue stats.
+    if partial_indexes:
+        open_tasks = Schedule.done == False
+        Schedule.add_index(
+            Schedule.index(Schedule.busy, Schedule.scheduled_date, where=open_tasks)
+        )
+        Schedule.add_index(
+            Schedule.index(
+                Schedule.automation,
+                Schedule.busy,
+                Schedule.retries,
+                Schedule.scheduled_date,
+                where=open_tasks,
+            )
+        )
+    else:
+        Schedule.add_index(Schedule.done, Schedule.busy, Schedule.scheduled_date)
+        Schedule.add_index(
+            Schedule.done,
+            Schedule.automation,
+            Schedule.busy,
+            Schedule.retries,
+            Schedule.scheduled_date,
+        )
+
+    return Schedule
+
+
+class SQLBackend(Backend):
+    """Backend storing the queue in a table through peewee.
+
+    Dialects subclass it with their ``Schedule`` model and override the
+    claiming queries where the database offers a faster path.
+    """
+
+    Schedule = None
+    returning = False  # the dialect supports INSERT and UPDATE ... RETURNING
+
+    def __init__(self, database):
+        super().__init__(database)
+        self.Schedule._meta.database.initialize(database)
+
+    def create_tables(self):
+        table = self.Schedule._meta.table_name
+
+        if self.database.table_exists(table):
+            self._migrate(table)
+
+        self.database.create_tables([self.Schedule])
+
+    def _migrate(self, table):
+        # Tables created by earlier versions lack the columns added since and
+        # some dialects made the optional columns NOT NULL.
+        from playhouse.migrate import SchemaMigrator, migrate
+
+        columns = {column.name: column for column in self.database.get_columns(table)}
+        migrator = SchemaMigrator.from_database(self.database)
+        operations = []
+
+        for field in self.Schedule._meta.sorted_fields:
+            column = columns.get(field.column_name)
+
+            if column is None:
+                # Indexes are left to create_tables, under the model's names.
+                field = copy.copy(field)
+                field.index = False
+                operations.append(migrator.add_column(table, field.column_name, field))
+            elif field.null and not column.null:
+                operations.append(migrator.drop_not_null(table, field.column_name))
+
+        if operations:
+            with self.database.atomic():
+                migrate(*operations)
+
+    def _pending(self):
+        Schedule = self.Schedule
+
+        return (
+            (Schedule.done == False)
+            & (Schedule.busy == False)
+            & (Schedule.retries < self.max_retries)
+        )
+
+    def _due_query(self):
+        Schedule = self.Schedule
+
+        return (
+            Schedule.select(Schedule.id)
+            .where(self._pending())
+            .where(Schedule.scheduled_date <= datetime.datetime.utcnow())
+            .order_by(Schedule.scheduled_date.asc())
+            .limit(1)
+        )
+
+    def _claim_query(self, condition):
+        Schedule = self.Schedule
+        now = datetime.datetime.utcnow()
+
+        # A task is never claimed before it is due, also when claimed by id.
+        return Schedule.update(busy=True, claimed_at=now).where(
+            condition & self._pending() & (Schedule.scheduled_date <= now)
+        )
+
+    def _claim_returning(self, condition):
+        # Claims and fetches in a single statement on dialects with RETURNING.
+        cursor = self._claim_query(condition).returning(self.Schedule).execute()
+
+        return next(iter(cursor), None)
+
+    def save_task(
+        self,
+        automation,
+        scheduled_date,
+        completion_date,
+        payload=None,
+        output=None,
+        fail_message=None,
+    ):
+        self.Schedule.create(
+            automation=automation,
+            scheduled_date=scheduled_date,
+            completion_date=completion_date,
+            started_at=scheduled_date,
+            finished_at=completion_date,
+            payload=payload,
+            done=True,
+            output=output,
+            fail_message=fail_message,
+        )
+
+    def pop_task(self):
+        # The claiming update only matches a task still pending, so a task
+        # taken by another worker in between is skipped for the next one.
+        while True:
+            with self.database.atomic() as txn:
+                schedule = self._due_query().first()
+
+                if not schedule:
+                    return
+
+                schedule = self.claim_task(schedule.id)
+
+                if schedule:
+                    return schedule
+
+    def claim_task(self, schedule_id):
+        with self.database.atomic() as txn:
+            claimed = self._claim_query(self.Schedule.id == schedule_id).execute()
+
+            if not claimed:
+                return
+
+            return self.Schedule.get_by_id(schedule_id)
+
+    def peek_tasks(self, since, until, limit):
+        Schedule = self.Schedule
+
+        return list(
+            Schedule.select(Schedule.id, Schedule.scheduled_date)
+            .where(self._pending())
+            .where(Schedule.scheduled_date > since)
+            .where(Schedule.scheduled_date <= until)
+            .order_by(Schedule.scheduled_date.asc())
+            .limit(limit)
+        )
+
+    def get_cached_task(self, cache_key, since):
+        Schedule = self.Schedule
+
+        return (
+            Schedule.select(Schedule.output, Schedule.completion_date)
+            .where(Schedule.cache_key == cache_key)
+            .where(Schedule.done == True)
+            .where(Schedule.completion_date >= since)
+            .order_by(Schedule.completion_date.desc())
+            .first()
+        )
+
+    def queue_stats(self, since, now=None):
+        Schedule = self.Schedule
+        now = now or datetime.datetime.utcnow()
+        open_task = (Schedule.busy == False) & (Schedule.retries < self.max_retries)
+        pending = open_task & (Schedule.scheduled_date <= now)
+        delayed = open_task & (Schedule.scheduled_date > now)
+        in_flight = Schedule.busy == True
+        failed = (Schedule.busy == False) & (Schedule.retries >= self.max_retries)
+
+        # Only open rows are aggregated here, served by the open tasks index
+        # without touching the completed history.
+        open_rows = (
+            Schedule.select(
+                Schedule.automation,
+                fn.SUM(Case(None, [(pending, 1)], 0)).alias("pending"),
+                fn.MIN(Case(None, [(pending, Schedule.scheduled_date)]))
+                .python_value(Schedule.scheduled_date.python_value)
+                .alias("oldest_pending"),
+                fn.SUM(Case(None, [(delayed, 1)], 0)).alias("delayed"),
+                fn.SUM(Case(None, [(in_flight, 1)], 0)).alias("in_flight"),
+                fn.SUM(Case(None, [(failed, 1)], 0)).alias("failed"),
+            )
+            .where(Schedule.done == False)
+            .group_by(Schedule.automation)
+            .dicts()
+        )
+
+        # Failed attempts of queued tasks are counted by their retries, failed
+        # cron and date executions are saved done with a fail message.
+        failed_run = (
+            (Schedule.done == True)
+            & (Schedule.retries == 0)
+            & Schedule.fail_message.is_null(False)
+        )
+        succeeded = (Schedule.done == True) & ~failed_run
+
+        recent_rows = (
+            Schedule.select(
+                Schedule.automation,
+                (
+                    fn.SUM(Schedule.retries) + fn.SUM(Case(None, [(failed_run, 1)], 0))
+                ).alias("failures"),
+                fn.SUM(Case(None, [(succeeded, 1)], 0)).alias("successes"),
+            )
+            .where(Schedule.finished_at >= since)
+            .group_by(Schedule.automation)
+            .dicts()
+        )
+
+        return list(open_rows), list(recent_rows)
+
+    def append_task(self, task, payload, scheduled_date=None):
+        with self.database.atomic() as txn:
+            return self.Schedule.create(
+                automation=task,
+                payload=payload,
+                scheduled_date=scheduled_date or datetime.datetime.utcnow(),
+            )
+
+    def _insert_tasks(self, tasks):
+        Schedule = self.Schedule
+        now = datetime.datetime.utcnow()
+        rows = [
+            {
+                "automation": task,
+                "payload": payload,
+                "scheduled_date": scheduled_date or now,
+            }
+            for task, payload, scheduled_date in tasks
+        ]
+
+        # Without RETURNING the ids of a multi-row insert are not known, the
+        # rows are then inserted one at a time.
+        if not self.returning:
+            return [Schedule.create(**row) for row in rows]
+
+        schedules = []
+        for batch in chunked(rows, BATCH_SIZE):
+            schedules.extend(Schedule.insert_many(batch).returning(Schedule).execute())
+
+        return schedules
+
+    def append_tasks(self, tasks):
+        with self.database.atomic() as txn:
+            return self._insert_tasks(tasks)
+
+    def complete_task(self, schedule, result):
+        with self.database.atomic() as txn:
+            schedule.output = result
+            schedule.done = True
+            schedule.busy = False
+            schedule.completion_date = datetime.datetime.utcnow()
+            schedule.save()
+
+    def pushback_task(self, schedule, fail_message=None):
+        with self.database.atomic() as txn:
+            schedule.retries += 1
+            schedule.busy = False
+            schedule.fail_message = {"message": fail_message}
+            schedule.save()
@@ -1,90 +1,35 @@
 # encoding: utf-8
-# app/extensions/scheduler/models.py
+# app/extensions/scheduler/sql/postgres.py
 
-import datetime
-
-from peewee import BooleanField, CharField, DateTimeField, IntegerField, Model, Proxy
+from peewee import Proxy
+from playhouse.db_url import connect as db_url_connect
 from playhouse.postgres_ext import JSONField
 
-proxy = Proxy()
-
-
-class BaseModel(Model):
-    class Meta:
-        database = proxy
-
-
-class Schedule(BaseModel):
-    class Meta:
-        db_table = "flask_tasker_schedule"
-
-    automation = CharField()
-    scheduled_date = DateTimeField(default=datetime.datetime.utcnow)
-    completion_date = DateTimeField()
-
-    payload = JSONField()
-    output = JSONField()
-    busy = BooleanField(default=False)
-    done = BooleanField(default=False)
-    retries = IntegerField(default=0)
-    fail_message = JSONField()
-
-
-def save_task(
-    automation,
-    scheduled_date,
-    completion_date,
-    payload=None,
-    output=None,
-    fail_message=None,
-):
-    Schedule.create(
-        automation=automation,
-        scheduled_date=scheduled_date,
-        completion_date=completion_date,
-        payload=payload,
-        done=True,
-        output=output,
-        fail_message=fail_message,
-    )
+from .base import SQLBackend, schedule_model
 
+proxy = Proxy()
 
-def pop_task():
-    with proxy.atomic() as txn:
-        _query = Schedule.select().order_by(Schedule.scheduled_date.desc())
-        schedule = (
-            _query.where(Schedule.done == False)
-            .where(Schedule.retries < 3)
-            .where(Schedule.busy == False)
-            .get_or_none()
-        )
+Schedule = schedule_model(proxy, JSONField, partial_indexes=True)
 
-        if not schedule:
-            return
 
-        schedule.busy = True
-        schedule.save()
+def connect(database_uri):
+    return db_url_connect(database_uri)
 
-        return schedule
 
+class PostgresBackend(SQLBackend):
+    Schedule = Schedule
+    returning = True
 
-def append_task(task, payload):
-    with proxy.atomic() as txn:
-        Schedule.create(automation=task, payload=payload)
+    def _due_query(self):
+        # Concurrent workers skip the rows locked by each other instead of
+        # waiting on them.
+        return super()._due_query().for_update("FOR UPDATE SKIP LOCKED")
 
+    def pop_task(self):
+        return self._claim_returning(Schedule.id.in_(self._due_query()))
 
-def complete_task(schedule, result):
-    with proxy.atomic() as txn:
-        schedule.output = result
-        schedule.done = True
-        schedule.busy = False
-        schedule.completion_date = datetime.datetime.utcnow()
-        schedule.save()
+    def claim_task(self, schedule_id):
+        return self._claim_returning(Schedule.id == schedule_id)
 
 
-def pushback_task(schedule, fail_message=None):
-    with proxy.atomic() as txn:
-        schedule.retries += 1
-        schedule.busy = False
-        schedule.fail_message = {"message": fail_message}
-        schedule.save()
+backend_class = PostgresBackend
@@ -1,90 +1,298 @@
 # encoding: utf-8
-# app/extensions/scheduler/models.py
+# app/extensions/scheduler/sql/sqlite.py
 
-import datetime
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
-from peewee import BooleanField, CharField, DateTimeField, IntegerField, Model, Proxy
+from peewee import Proxy, SqliteDatabase
 from playhouse.sqlite_ext import JSONField
 
+from .base import SQLBackend, schedule_model
+
 proxy = Proxy()
 
+Schedule = schedule_model(proxy, JSONField)
+
+# UPDATE ... RETURNING is available since SQLite 3.35.
+HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+WRITER_BATCH_SIZE = 1000
+WRITER_TIMEOUT = 30  # seconds a write waits for room in the writer queue
+WRITER_COMMIT_TIMEOUT = 60  # seconds a write waits for the writer to start it
+
+
+class WriterQueueFullException(Exception):
+    "Raised when the writer queue stays full for longer than the timeout"
+
+    def __init__(self, message="SQLite writer queue is full"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class WriterTimeoutException(Exception):
+    "Raised when the writer does not start a write within the timeout"
 
-class BaseModel(Model):
-    class Meta:
-        database = proxy
-
-
-class Schedule(BaseModel):
-    class Meta:
-        db_table = "flask_tasker_schedule"
-
-    automation = CharField()
-    scheduled_date = DateTimeField(default=datetime.datetime.utcnow)
-    completion_date = DateTimeField(null=True)
-
-    payload = JSONField(null=True)
-    output = JSONField(null=True)
-    busy = BooleanField(default=False)
-    done = BooleanField(default=False)
-    retries = IntegerField(default=0)
-    fail_message = JSONField(null=True)
-
-
-def save_task(
-    automation,
-    scheduled_date,
-    completion_date,
-    payload=None,
-    output=None,
-    fail_message=None,
-):
-    Schedule.create(
-        automation=automation,
-        scheduled_date=scheduled_date,
-        completion_date=completion_date,
-        payload=payload,
-        done=True,
-        output=output,
-        fail_message=fail_message,
+    def __init__(self, message="SQLite writer did not start the write in time"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class WriterStoppedException(Exception):
+    "Raised for the writes left in the queue of a writer that stopped"
+
+    def __init__(self, message="SQLite writer stopped"):
+        self.message = message
+        super().__init__(self.message)
+
+
+def connect(database_uri):
+    database_uri = database_uri.replace("\\", "/")
+    database_uri = database_uri.replace("sqlite:///", "")
+
+    return SqliteDatabase(
+        database_uri,
+        pragmas={
+            "journal_mode": "wal",
+            "journal_size_limit": 1024,
+            "cache_size": -1024 * 64,  # 64MB
+            "foreign_keys": 1,
+            "ignore_check_constraints": 0,
+            "synchronous": 0,
+        },
     )
 
 
-def pop_task():
-    with proxy.atomic() as txn:
-        _query = Schedule.select().order_by(Schedule.scheduled_date.desc())
-        schedule = (
-            _query.where(Schedule.done == False)
-            .where(Schedule.retries < 3)
-            .where(Schedule.busy == False)
-            .get_or_none()
-        )
+class _Writer(threading.Thread):
+    """Thread performing every write to the database.
+
+    Writes submitted from any thread are queued and the thread commits them
+    in groups. Enqueued tasks of a group are inserted together, the other
+    writes run each in its own savepoint so a failing one does not undo the
+    rest of its group.
+    """
+
+    def __init__(self, backend, queue_size):
+        super().__init__(name="flask-taskx-sqlite-writer", daemon=True)
+        self.backend = backend
+        self.database = backend.database
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch = []  # writes taken from the queue and not committed yet
+
+    def submit(self, f, *args, **kwargs):
+        future = Future()
+
+        try:
+            self.queue.put((future, f, args, kwargs), timeout=WRITER_TIMEOUT)
+        except queue.Full:
+            raise WriterQueueFullException
+
+        try:
+            return future.result(timeout=WRITER_COMMIT_TIMEOUT)
+        except FutureTimeoutError:
+            # A write the writer has not started is dropped, one it is already
+            # committing is waited for, so a claim is never committed after
+            # its caller gave up on it.
+            if future.cancel():
+                raise WriterTimeoutException
+
+            return future.result()
+
+    def close(self):
+        self.queue.put(None)
+        self.join()
+
+    def run(self):
+        try:
+            self._run()
+        finally:
+            # Callers would otherwise wait for writes nobody is left to commit.
+            while True:
+                try:
+                    self.batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for write in self.batch:
+                if write is not None and not write[0].done():
+                    write[0].set_exception(WriterStoppedException())
+
+    def _run(self):
+        while True:
+            self.batch = [self.queue.get()]
+
+            while len(self.batch) < WRITER_BATCH_SIZE:
+                try:
+                    self.batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in self.batch
+            self._commit([write for write in self.batch if write is not None])
+            self.batch = []
+
+            if stop:
+                self.database.close()
+                return
+
+    def _commit(self, batch):
+        batch = [write for write in batch if write[0].set_running_or_notify_cancel()]
+        appends = [write for write in batch if write[1] is None]
+        writes = [write for write in batch if write[1] is not None]
+        results = []
 
-        if not schedule:
+        try:
+            with self.database.atomic():
+                if appends:
+                    self._insert(appends, results)
+
+                for future, f, args, kwargs in writes:
+                    try:
+                        with self.database.atomic():
+                            results.append((future, f(*args, **kwargs), None))
+                    except Exception as e:
+                        results.append((future, None, e))
+        except Exception as e:
+            for future, _, _, _ in batch:
+                future.set_exception(e)
+            return
+
+        # Callers are only released once their writes are committed.
+        for future, result, exception in results:
+            if exception is None:
+                future.set_result(result)
+            else:
+                future.set_exception(exception)
+
+    def _insert(self, appends, results):
+        try:
+            with self.database.atomic():
+                schedules = self.backend._insert_tasks(
+                    [args for _, _, args, _ in appends]
+                )
+        except Exception:
+            # Find out which tasks failed by inserting them one at a time.
+            for future, _, args, _ in appends:
+                try:
+                    with self.database.atomic():
+                        schedule = self.backend._insert_tasks([args])[0]
+                    results.append((future, schedule, None))
+                except Exception as e:
+                    results.append((future, None, e))
             return
 
-        schedule.busy = True
-        schedule.save()
+        for (future, _, _, _), schedule in zip(appends, schedules):
+            results.append((future, schedule, None))
+
+
+class SqliteBackend(SQLBackend):
+    """SQLite backend, when ``writer_queue_size`` is given every write goes
+    through a single writer thread that group commits them, instead of each
+    thread contending for the database lock with its own transaction.
+
+    :param database: the SQLite database
+    :param int writer_queue_size: maximum number of writes waiting for the
+        writer thread, callers block once it is reached
+    """
+
+    Schedule = Schedule
+    returning = HAS_RETURNING
+
+    def __init__(self, database, writer_queue_size=None):
+        super().__init__(database)
+        self._writer = None
+        self._writer_pid = None
+        self._writer_lock = threading.Lock()
+        self._writer_queue_size = writer_queue_size
+        self._closed = False
+
+        if writer_queue_size:
+            self._start_writer()
+            atexit.register(self.close)
+
+    def _start_writer(self):
+        self._writer = _Writer(self, self._writer_queue_size)
+        self._writer_pid = os.getpid()
+        self._writer.start()
+
+    def _get_writer(self):
+        if not self._writer_queue_size or self._closed:
+            return None
+
+        # The writer does not exist in a forked process and is started again
+        # there, as it is after an unexpected stop.
+        with self._writer_lock:
+            if self._writer_pid != os.getpid() or not self._writer.is_alive():
+                self._start_writer()
+
+            return self._writer
+
+    def close(self):
+        self._closed = True
+
+        if self._writer and self._writer.is_alive() and self._writer_pid == os.getpid():
+            self._writer.close()
+
+    def _direct(self, writer):
+        # Writes made within a transaction of the caller join it instead of
+        # being committed apart by the writer.
+        return (
+            writer is None
+            or threading.current_thread() is writer
+            or self.database.in_transaction()
+        )
+
+    def _write(self, f, *args, **kwargs):
+        writer = self._get_writer()
+
+        if self._direct(writer):
+            return f(*args, **kwargs)
+
+        return writer.submit(f, *args, **kwargs)
+
+    def _pop_task(self):
+        if not HAS_RETURNING:
+            return super().pop_task()
+
+        return self._claim_returning(Schedule.id.in_(self._due_query()))
+
+    def _claim_task(self, schedule_id):
+        if not HAS_RETURNING:
+            return super().claim_task(schedule_id)
+
+        return self._claim_returning(Schedule.id == schedule_id)
+
+    def pop_task(self):
+        return self._write(self._pop_task)
+
+    def claim_task(self, schedule_id):
+        return self._write(self._claim_task, schedule_id)
+
+    def save_task(self, *args, **kwargs):
+        return self._write(super().save_task, *args, **kwargs)
+
+    def append_task(self, task, payload, scheduled_date=None):
+        writer = self._get_writer()
 
-        return schedule
+        if self._direct(writer):
+            return super().append_task(task, payload, scheduled_date=scheduled_date)
 
+        # Enqueued tasks are submitted as data, so the writer can coalesce
+        # them into multi-row inserts.
+        return writer.submit(None, task, payload, scheduled_date)
 
-def append_task(task, payload):
-    with proxy.atomic() as txn:
-        Schedule.create(automation=task, payload=payload)
+    def append_tasks(self, tasks):
+        return self._write(super().append_tasks, tasks)
 
+    def complete_task(self, schedule, result):
+        return self._write(super().complete_task, schedule, result)
 
-def complete_task(schedule, result):
-    with proxy.atomic() as txn:
-        schedule.output = result
-        schedule.done = True
-        schedule.busy = False
-        schedule.completion_date = datetime.datetime.utcnow()
-        schedule.save()
+    def pushback_task(self, schedule, fail_message=None):
+        return self._write(super().pushback_task, schedule, fail_message)
 
 
-def pushback_task(schedule, fail_message=None):
-    with proxy.atomic() as txn:
-        schedule.retries += 1
-        schedule.busy = False
-        schedule.fail_message = {"message": fail_message}
-        schedule.save()
+backend_class = SqliteBackend
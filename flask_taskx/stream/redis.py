@@ -0,0 +1,530 @@
+# encoding: utf-8
+# app/extensions/scheduler/stream/redis.py
+
+import datetime
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+
+from redis import Redis
+from redis.exceptions import RedisError, ResponseError
+
+from ..backend import Backend
+
+prefix = "flask_taskx"
+group = "workers"
+consumer = None  # defaults to "<host>-<pid>" of the process reading the stream
+
+block_time = 1000  # ms a pop waits for a new task
+claim_idle_time = 5 * 60  # seconds before a task of a dead consumer is reclaimed
+history_size = 10000
+result_ttl = 24 * 60 * 60
+
+
+# Moves the delayed tasks due by ARGV[1], at most ARGV[2] of them, to the
+# stream, or only the task ARGV[3] when given. Running as a script, a task is
+# never moved twice nor lost between the delayed set and the stream.
+_MOVE_DUE_TASKS = """
+local ids
+if ARGV[3] ~= '' then
+    local score = redis.call('ZSCORE', KEYS[1], ARGV[3])
+    if not score or tonumber(score) > tonumber(ARGV[1]) then
+        return 0
+    end
+    ids = {ARGV[3]}
+else
+    ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+end
+for _, id in ipairs(ids) do
+    local data = redis.call('HGET', KEYS[2], id)
+    redis.call('ZREM', KEYS[1], id)
+    redis.call('HDEL', KEYS[2], id)
+    if data then
+        redis.call('XADD', KEYS[3], '*', 'data', data)
+    end
+end
+return #ids
+"""
+
+
+def _key(*parts):
+    return ":".join((prefix,) + parts)
+
+
+def _consumer():
+    # Resolved on every call, a forked worker reads under its own name.
+    return consumer or "{}-{}".format(socket.gethostname(), os.getpid())
+
+
+def _timestamp(date):
+    return date.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def _from_timestamp(timestamp):
+    return datetime.datetime.fromtimestamp(
+        float(timestamp), datetime.timezone.utc
+    ).replace(tzinfo=None)
+
+
+def _isoformat(date):
+    return date.isoformat() if date else None
+
+
+def _from_isoformat(date):
+    return datetime.datetime.fromisoformat(date) if date else None
+
+
+class Schedule:
+    """A task of the stream queue, it exposes the same attributes as the
+    ``Schedule`` model of the SQL backends.
+    """
+
+    def __init__(
+        self,
+        id,
+        automation,
+        payload=None,
+        scheduled_date=None,
+        retries=0,
+        fail_message=None,
+        message_id=None,
+    ):
+        self.id = id
+        self.automation = automation
+        self.payload = payload
+        self.scheduled_date = scheduled_date
+        self.retries = retries
+        self.fail_message = fail_message
+        self.message_id = message_id
+
+        self.busy = False
+        self.done = False
+        self.output = None
+        self.completion_date = None
+        self.claimed_at = None
+        self.started_at = None
+        self.finished_at = None
+        self.profile = None
+        self.cache_key = None
+
+    @classmethod
+    def from_message(cls, data, message_id=None):
+        data = json.loads(data)
+
+        return cls(
+            data["id"],
+            data["automation"],
+            payload=data["payload"],
+            scheduled_date=_from_isoformat(data["scheduled_date"]),
+            retries=data["retries"],
+            fail_message=data["fail_message"],
+            message_id=message_id,
+        )
+
+    def to_message(self):
+        return json.dumps(
+            {
+                "id": self.id,
+                "automation": self.automation,
+                "payload": self.payload,
+                "scheduled_date": _isoformat(self.scheduled_date),
+                "retries": self.retries,
+                "fail_message": self.fail_message,
+            }
+        )
+
+    def to_record(self):
+        return json.dumps(
+            {
+                "id": self.id,
+                "automation": self.automation,
+                "payload": self.payload,
+                "output": self.output,
+                "done": self.done,
+                "retries": self.retries,
+                "fail_message": self.fail_message,
+                "scheduled_date": _isoformat(self.scheduled_date),
+                "completion_date": _isoformat(self.completion_date),
+                "claimed_at": _isoformat(self.claimed_at),
+                "started_at": _isoformat(self.started_at),
+                "finished_at": _isoformat(self.finished_at),
+                "profile": self.profile,
+            }
+        )
+
+
+def connect(database_uri):
+    return Redis.from_url(database_uri, decode_responses=True)
+
+
+def _fields_data(fields):
+    return fields.get("data", fields.get(b"data"))
+
+
+class RedisBackend(Backend):
+    """Backend storing the queue in a Redis stream read through a consumer group.
+
+    Tasks claimed by this process are claimed again periodically while they
+    run, so only the tasks of a consumer that stopped doing so for
+    ``claim_idle_time`` seconds are taken over by other consumers.
+
+    :param database: the Redis client
+    :param float claim_idle_time: seconds a claimed task can go without
+        being claimed again before another consumer takes it over
+    """
+
+    blocking = True
+
+    def __init__(self, database, claim_idle_time=claim_idle_time):
+        super().__init__(database)
+        self.claim_idle_time = claim_idle_time
+        self._move_due_tasks = database.register_script(_MOVE_DUE_TASKS)
+        self._claimed = set()
+        self._claimed_lock = threading.Lock()
+        self._heartbeat = None
+
+    def create_tables(self):
+        try:
+            self.database.xgroup_create(_key("stream"), group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def _push(self, pipe, schedule, now):
+        pipe.sadd(_key("automations"), schedule.automation)
+        pipe.zadd(
+            _key("pending", schedule.automation),
+            {schedule.id: _timestamp(schedule.scheduled_date)},
+        )
+
+        if schedule.scheduled_date > now:
+            pipe.hset(_key("delayed", "data"), schedule.id, schedule.to_message())
+            pipe.zadd(
+                _key("delayed"), {schedule.id: _timestamp(schedule.scheduled_date)}
+            )
+        else:
+            pipe.xadd(_key("stream"), {"data": schedule.to_message()})
+
+    def _record(self, pipe, schedule, outcome):
+        bucket = _key("stats", str(int(time.time() // 60)))
+        pipe.hincrby(bucket, "{}:{}".format(schedule.automation, outcome), 1)
+        pipe.expire(bucket, result_ttl)
+        pipe.xadd(
+            _key("history"),
+            {"data": schedule.to_record()},
+            maxlen=history_size,
+            approximate=True,
+        )
+
+    def _release(self, pipe, schedule):
+        if schedule.message_id:
+            pipe.xack(_key("stream"), group, schedule.message_id)
+            pipe.xdel(_key("stream"), schedule.message_id)
+
+            with self._claimed_lock:
+                self._claimed.discard(schedule.message_id)
+
+        pipe.hincrby(_key("in_flight"), schedule.automation, -1)
+
+    def _claim(self, schedule, reclaimed=False):
+        schedule.busy = True
+        schedule.claimed_at = datetime.datetime.utcnow()
+
+        with self._claimed_lock:
+            self._claimed.add(schedule.message_id)
+
+            # Started on the first claim, or again in a forked process.
+            if self._heartbeat is None or not self._heartbeat.is_alive():
+                self._heartbeat = threading.Thread(
+                    target=self._keep_claimed,
+                    name="flask-taskx-redis-heartbeat",
+                    daemon=True,
+                )
+                self._heartbeat.start()
+
+        if not reclaimed:
+            with self.database.pipeline() as pipe:
+                pipe.zrem(_key("pending", schedule.automation), schedule.id)
+                pipe.hincrby(_key("in_flight"), schedule.automation, 1)
+                pipe.execute()
+
+        return schedule
+
+    def _keep_claimed(self):
+        # Claiming a pending task again resets its idle time, JUSTID leaves
+        # its delivery count unchanged.
+        while True:
+            time.sleep(self.claim_idle_time / 3)
+
+            with self._claimed_lock:
+                message_ids = list(self._claimed)
+
+            if not message_ids:
+                continue
+
+            try:
+                self.database.xclaim(
+                    _key("stream"),
+                    group,
+                    _consumer(),
+                    min_idle_time=0,
+                    message_ids=message_ids,
+                    justid=True,
+                )
+            except RedisError:
+                continue
+
+    def _promote_due_tasks(self, schedule_id=""):
+        return self._move_due_tasks(
+            keys=[_key("delayed"), _key("delayed", "data"), _key("stream")],
+            args=[time.time(), 100, schedule_id],
+        )
+
+    def _read(self, block=None):
+        response = self.database.xreadgroup(
+            group, _consumer(), {_key("stream"): ">"}, count=1, block=block
+        )
+
+        if not response or not response[0][1]:
+            return
+
+        _, messages = response[0]
+        message_id, fields = messages[0]
+
+        return self._claim(Schedule.from_message(_fields_data(fields), message_id))
+
+    def save_task(
+        self,
+        automation,
+        scheduled_date,
+        completion_date,
+        payload=None,
+        output=None,
+        fail_message=None,
+    ):
+        schedule = Schedule(
+            uuid.uuid4().hex,
+            automation,
+            payload=payload,
+            scheduled_date=scheduled_date,
+            fail_message=fail_message,
+        )
+        schedule.done = True
+        schedule.output = output
+        schedule.completion_date = completion_date
+        schedule.started_at = scheduled_date
+        schedule.finished_at = completion_date
+
+        with self.database.pipeline() as pipe:
+            self._record(pipe, schedule, "failures" if fail_message else "successes")
+            pipe.execute()
+
+    def pop_task(self):
+        self._promote_due_tasks()
+
+        # Tasks left unacknowledged by a dead consumer are taken over first.
+        _, messages, _ = self.database.xautoclaim(
+            _key("stream"),
+            group,
+            _consumer(),
+            min_idle_time=int(self.claim_idle_time * 1000),
+            start_id="0-0",
+            count=1,
+        )
+
+        if messages:
+            message_id, fields = messages[0]
+            return self._claim(
+                Schedule.from_message(_fields_data(fields), message_id), reclaimed=True
+            )
+
+        return self._read(block_time)
+
+    def claim_task(self, schedule_id):
+        # The task is moved to the stream and read from it like any other, so
+        # it is tracked in the pending entries of the group until acknowledged
+        # and taken over if this worker dies. Another due task may be read
+        # instead, the moved one is then read by another worker.
+        if not self._promote_due_tasks(schedule_id):
+            return
+
+        return self._read()
+
+    def peek_tasks(self, since, until, limit):
+        due = self.database.zrangebyscore(
+            _key("delayed"),
+            "({}".format(_timestamp(since)),
+            _timestamp(until),
+            start=0,
+            num=limit,
+            withscores=True,
+        )
+
+        return [
+            Schedule(schedule_id, None, scheduled_date=_from_timestamp(score))
+            for schedule_id, score in due
+        ]
+
+    def get_cached_task(self, cache_key, since):
+        data = self.database.get(_key("cache", cache_key))
+
+        if not data:
+            return
+
+        data = json.loads(data)
+        completion_date = _from_isoformat(data["completion_date"])
+
+        if completion_date < since:
+            return
+
+        schedule = Schedule(None, None)
+        schedule.output = data["output"]
+        schedule.completion_date = completion_date
+
+        return schedule
+
+    def queue_stats(self, since, now=None):
+        now = _timestamp(now or datetime.datetime.utcnow())
+        automations = sorted(self.database.smembers(_key("automations")))
+
+        # The pending sets are scored by scheduled date, the tasks scheduled
+        # after now are delayed.
+        with self.database.pipeline() as pipe:
+            for automation in automations:
+                pipe.zcount(_key("pending", automation), "-inf", now)
+                pipe.zrangebyscore(
+                    _key("pending", automation),
+                    "-inf",
+                    now,
+                    start=0,
+                    num=1,
+                    withscores=True,
+                )
+                pipe.zcount(_key("pending", automation), "({}".format(now), "+inf")
+                pipe.hget(_key("in_flight"), automation)
+                pipe.hget(_key("failed"), automation)
+            results = pipe.execute()
+
+        open_rows = []
+        for index, automation in enumerate(automations):
+            pending, oldest, delayed, in_flight, failed = results[
+                index * 5 : index * 5 + 5
+            ]
+            open_rows.append(
+                {
+                    "automation": automation,
+                    "pending": pending,
+                    "oldest_pending": _from_timestamp(oldest[0][1]) if oldest else None,
+                    "delayed": delayed,
+                    "in_flight": max(int(in_flight or 0), 0),
+                    "failed": int(failed or 0),
+                }
+            )
+
+        # Executions are counted in one hash per minute, only the buckets
+        # within the window are read.
+        first = int(_timestamp(since) // 60)
+        last = int(time.time() // 60)
+
+        with self.database.pipeline() as pipe:
+            for minute in range(first, last + 1):
+                pipe.hgetall(_key("stats", str(minute)))
+            buckets = pipe.execute()
+
+        recent = {}
+        for bucket in buckets:
+            for field, count in bucket.items():
+                if isinstance(field, bytes):
+                    field = field.decode("utf-8")
+
+                automation, outcome = field.rsplit(":", 1)
+                row = recent.setdefault(
+                    automation,
+                    {"automation": automation, "failures": 0, "successes": 0},
+                )
+                row[outcome] += int(count)
+
+        return open_rows, list(recent.values())
+
+    def append_task(self, task, payload, scheduled_date=None):
+        now = datetime.datetime.utcnow()
+        schedule = Schedule(
+            uuid.uuid4().hex,
+            task,
+            payload=payload,
+            scheduled_date=scheduled_date or now,
+        )
+
+        with self.database.pipeline() as pipe:
+            self._push(pipe, schedule, now)
+            pipe.execute()
+
+        return schedule
+
+    def append_tasks(self, tasks):
+        now = datetime.datetime.utcnow()
+        schedules = []
+
+        with self.database.pipeline() as pipe:
+            for task, payload, scheduled_date in tasks:
+                schedule = Schedule(
+                    uuid.uuid4().hex,
+                    task,
+                    payload=payload,
+                    scheduled_date=scheduled_date or now,
+                )
+                self._push(pipe, schedule, now)
+                schedules.append(schedule)
+            pipe.execute()
+
+        return schedules
+
+    def complete_task(self, schedule, result):
+        schedule.output = result
+        schedule.done = True
+        schedule.busy = False
+        schedule.completion_date = datetime.datetime.utcnow()
+
+        with self.database.pipeline() as pipe:
+            self._release(pipe, schedule)
+            self._record(pipe, schedule, "successes")
+
+            if schedule.cache_key:
+                pipe.set(
+                    _key("cache", schedule.cache_key),
+                    json.dumps(
+                        {
+                            "output": result,
+                            "completion_date": _isoformat(schedule.completion_date),
+                        }
+                    ),
+                    ex=result_ttl,
+                )
+            pipe.execute()
+
+    def pushback_task(self, schedule, fail_message=None):
+        schedule.retries += 1
+        schedule.busy = False
+        schedule.fail_message = {"message": fail_message}
+
+        with self.database.pipeline() as pipe:
+            self._release(pipe, schedule)
+            self._record(pipe, schedule, "failures")
+
+            if schedule.retries < self.max_retries:
+                self._push(pipe, schedule, datetime.datetime.utcnow())
+            else:
+                pipe.hincrby(_key("failed"), schedule.automation, 1)
+                pipe.xadd(
+                    _key("dead"),
+                    {"data": schedule.to_record()},
+                    maxlen=history_size,
+                    approximate=True,
+                )
+            pipe.execute()
+
+
+backend_class = RedisBackend
@@ -0,0 +1,67 @@
+# encoding: utf-8
+# app/extensions/scheduler/workers.py
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.blocking import BlockingScheduler
+
+from .core import BaseTaskWorker
+
+
+class BackgroundTaskWorker(BaseTaskWorker, BackgroundScheduler):
+    """Manages scheduled background tasks
+
+    :param app: Flask instance
+    """
+
+    def __init__(self, app=None):
+        BackgroundScheduler.__init__(self)
+        BaseTaskWorker.__init__(self)
+
+        if app:
+            BaseTaskWorker.init_app(self, app)
+
+    def init_app(self, app):
+        """Initializes your tasks settings from the application settings.
+
+        You can use this if you want to set up your BackgroundTaskWorker instance
+        at configuration time.
+
+        :param app: Flask application instance
+        """
+
+        BaseTaskWorker.init_app(self, app)
+        app._task_worker = self
+
+    def start(self):
+        BaseTaskWorker.start(self)
+        BackgroundScheduler.start(self)
+
+
+class BlockingTaskWorker(BaseTaskWorker, BlockingScheduler):
+    """Manages scheduled tasks
+
+    :param app: Flask instance
+    """
+
+    def __init__(self, app=None):
+        BlockingScheduler.__init__(self)
+        BaseTaskWorker.__init__(self)
+
+        if app:
+            BaseTaskWorker.init_app(self, app)
+
+    def init_app(self, app):
+        """Initializes your tasks settings from the application settings.
+
+        You can use this if you want to set up your BlockingTaskWorker instance
+        at configuration time.
+
+        :param app: Flask application instance
+        """
+
+        BaseTaskWorker.init_app(self, app)
+        app._task_worker = self
+
+    def start(self):
+        BaseTaskWorker.start(self)
+        BlockingScheduler.start(self)
@@ -28,18 +28,19 @@ setup(
     description="A Flask extension for defining and running tasks",
     long_description=long_description,
     long_description_content_type="text/markdown",
-    py_modules=["flask_taskx"],
+    packages=["flask_taskx", "flask_taskx.sql", "flask_taskx.stream"],
     zip_safe=False,
     platforms="any",
     entry_points={
         'console_scripts': [
-            'taskx = flask_taskx:cli',
+            'taskx = flask_taskx.cli:taskx_cli',
         ],
     },
-    install_requires=["Flask", "apscheduler", "peewee", "Click==7.0",],
+    install_requires=["Flask", "apscheduler", "blinker", "peewee", "Click==7.0",],
+    extras_require={"redis": ["redis>=4.2"]},
     tests_require=[
-        "nose",
-        "mock",
+        "pytest",
+        "fakeredis[lua]",
     ],
     classifiers=[
         "Development Status :: 4 - Beta",
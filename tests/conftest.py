@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from flask import Flask
+
+from flask_taskx import BlockingTaskWorker
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(
+        TASKER_DATABASE_URI="sqlite:///{}".format(tmp_path / "tasks.db"),
+        TASKER_DRIVER="sqlite",
+    )
+
+    return app
+
+
+@pytest.fixture
+def worker(app):
+    worker = BlockingTaskWorker()
+    worker.init_app(app)
+    worker.create_tables()
+
+    yield worker
+
+    worker._database.close()
@@ -0,0 +1,495 @@
+# -*- coding: utf-8 -*-
+"""Conformance suite of the queue backends.
+
+Every backend runs the same tests, PostgreSQL and MySQL ones only when
+``TASKER_TEST_POSTGRES_URI`` or ``TASKER_TEST_MYSQL_URI`` point to a
+database the suite may create and drop the tasks table in.
+"""
+
+import datetime
+import os
+import threading
+import time
+
+import pytest
+from peewee import Database
+
+BACKENDS = ["sqlite", "sqlite-writer", "redis", "postgres", "mysql"]
+
+
+def _sqlite(tmp_path, writer_queue_size=None):
+    from flask_taskx.sql import sqlite
+
+    database = sqlite.connect("sqlite:///{}".format(tmp_path / "tasks.db"))
+    backend = sqlite.backend_class(database, writer_queue_size=writer_queue_size)
+    backend.create_tables()
+
+    yield backend
+
+    backend.close()
+    database.close()
+
+
+def _redis(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    from flask_taskx.stream import redis as stream
+
+    monkeypatch.setattr(stream, "block_time", 10)
+    database = fakeredis.FakeRedis(server=fakeredis.FakeServer(), decode_responses=True)
+    backend = stream.backend_class(database)
+    backend.create_tables()
+
+    yield backend
+
+
+def _server(module_name, variable):
+    from importlib import import_module
+
+    database_uri = os.environ.get(variable)
+
+    if not database_uri:
+        pytest.skip("{} is not set".format(variable))
+
+    module = import_module(module_name)
+    database = module.connect(database_uri)
+    backend = module.backend_class(database)
+    database.drop_tables([backend.Schedule])
+    backend.create_tables()
+
+    yield backend
+
+    database.drop_tables([backend.Schedule])
+    database.close()
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, tmp_path, monkeypatch):
+    if request.param == "sqlite":
+        yield from _sqlite(tmp_path)
+    elif request.param == "sqlite-writer":
+        yield from _sqlite(tmp_path, writer_queue_size=100)
+    elif request.param == "redis":
+        yield from _redis(monkeypatch)
+    elif request.param == "postgres":
+        yield from _server("flask_taskx.sql.postgres", "TASKER_TEST_POSTGRES_URI")
+    else:
+        yield from _server("flask_taskx.sql.mysql", "TASKER_TEST_MYSQL_URI")
+
+
+def _close_connection(backend):
+    # Peewee opens a connection per thread, closed when the thread is done.
+    if isinstance(backend.database, Database):
+        backend.database.close()
+
+
+def _now():
+    return datetime.datetime.utcnow()
+
+
+def _later():
+    return _now() + datetime.timedelta(hours=1)
+
+
+def _append_due(backend):
+    # Enqueued as a delayed task, then left to become due, the way the
+    # timers of a worker claim tasks.
+    schedule = backend.append_task(
+        "task", None, _now() + datetime.timedelta(seconds=0.2)
+    )
+    time.sleep(0.3)
+
+    return schedule
+
+
+def _open_stats(backend):
+    open_rows, _ = backend.queue_stats(_now() - datetime.timedelta(hours=1))
+
+    return {row["automation"]: row for row in open_rows}
+
+
+def test_append_and_pop(backend):
+    schedule = backend.append_task("task", {"n": 1})
+
+    popped = backend.pop_task()
+
+    assert popped.id == schedule.id
+    assert popped.automation == "task"
+    assert popped.payload == {"n": 1}
+    assert popped.busy
+    assert popped.claimed_at is not None
+    assert backend.pop_task() is None
+
+
+def test_tasks_are_popped_in_order(backend):
+    schedules = [backend.append_task("task", {"n": n}) for n in range(5)]
+
+    popped = [backend.pop_task().id for _ in schedules]
+
+    assert popped == [schedule.id for schedule in schedules]
+
+
+def test_future_task_is_never_popped(backend):
+    schedule = backend.append_task("task", None, _later())
+
+    assert backend.pop_task() is None
+    assert backend.claim_task(schedule.id) is None
+    assert _open_stats(backend)["task"]["delayed"] == 1
+
+
+def test_claim_task(backend):
+    schedule = _append_due(backend)
+
+    claimed = backend.claim_task(schedule.id)
+
+    assert claimed.id == schedule.id
+    assert claimed.busy
+    assert backend.claim_task(schedule.id) is None
+    assert backend.pop_task() is None
+
+
+def test_peek_tasks(backend):
+    now = _now()
+    soon = backend.append_task("task", None, now + datetime.timedelta(minutes=1))
+    backend.append_task("task", None, now + datetime.timedelta(minutes=10))
+
+    peeked = backend.peek_tasks(now, now + datetime.timedelta(minutes=5), 10)
+
+    assert [schedule.id for schedule in peeked] == [soon.id]
+    assert backend.peek_tasks(now, now + datetime.timedelta(minutes=5), 0) == []
+
+
+def test_retry_limit_is_respected(backend):
+    backend.append_task("task", None)
+
+    for _ in range(backend.max_retries):
+        schedule = backend.pop_task()
+        assert schedule is not None
+        backend.pushback_task(schedule, "failed")
+
+    assert backend.pop_task() is None
+
+    stats = _open_stats(backend)["task"]
+    assert stats["failed"] == 1
+    assert stats["pending"] == 0
+    assert stats["in_flight"] == 0
+
+
+def test_complete_task(backend):
+    backend.append_task("task", {"n": 1})
+    schedule = backend.pop_task()
+    schedule.cache_key = "key"
+    since = _now() - datetime.timedelta(seconds=1)
+
+    backend.complete_task(schedule, {"result": 1})
+
+    assert backend.pop_task() is None
+    assert backend.get_cached_task("key", since).output == {"result": 1}
+    assert backend.get_cached_task("key", _later()) is None
+    assert backend.get_cached_task("other", since) is None
+
+    stats = _open_stats(backend).get("task", {"pending": 0, "in_flight": 0})
+    assert stats["pending"] == 0
+    assert stats["in_flight"] == 0
+
+
+def test_recent_executions(backend):
+    since = _now() - datetime.timedelta(seconds=1)
+    backend.append_tasks([("task", None, None)] * 2)
+
+    # Executions are timed by the worker before they are released.
+    def run():
+        schedule = backend.pop_task()
+        schedule.started_at = schedule.finished_at = _now()
+        return schedule
+
+    backend.pushback_task(run(), "failed")
+    for _ in range(2):
+        backend.complete_task(run(), None)
+    backend.save_task("cron", since, _now(), output=1)
+    backend.save_task("cron", since, _now(), fail_message="failed")
+
+    _, recent_rows = backend.queue_stats(since)
+    recent = {row["automation"]: row for row in recent_rows}
+
+    assert (recent["task"]["failures"], recent["task"]["successes"]) == (1, 2)
+    assert (recent["cron"]["failures"], recent["cron"]["successes"]) == (1, 1)
+
+
+def test_queue_stats(backend):
+    backend.append_tasks([("task", None, None)] * 3 + [("task", None, _later())])
+    backend.pop_task()
+
+    stats = _open_stats(backend)["task"]
+
+    assert stats["pending"] == 2
+    assert stats["delayed"] == 1
+    assert stats["in_flight"] == 1
+    assert stats["failed"] == 0
+    assert stats["oldest_pending"] <= _now()
+
+
+def test_append_tasks_returns_schedules(backend):
+    schedules = backend.append_tasks([("task", {"n": n}, None) for n in range(3)])
+
+    assert [schedule.payload for schedule in schedules] == [{"n": n} for n in range(3)]
+    assert [backend.pop_task().id for _ in schedules] == [
+        schedule.id for schedule in schedules
+    ]
+
+
+def test_append_tasks_is_all_or_nothing(backend):
+    tasks = [("task", {"n": n}, None) for n in range(5)]
+    tasks.insert(3, ("task", {"n": object()}, None))
+
+    with pytest.raises(Exception):
+        backend.append_tasks(tasks)
+
+    assert backend.pop_task() is None
+    assert "task" not in _open_stats(backend)
+
+
+def test_concurrent_pops_claim_each_task_once(backend):
+    tasks = 200
+    backend.append_tasks([("task", {"n": n}, None) for n in range(tasks)])
+    popped = []
+    errors = []
+
+    def pop():
+        try:
+            while True:
+                schedule = backend.pop_task()
+
+                if schedule is None:
+                    return
+
+                popped.append(schedule.payload["n"])
+        except Exception as e:
+            errors.append(e)
+        finally:
+            _close_connection(backend)
+
+    threads = [threading.Thread(target=pop) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(popped) == list(range(tasks))
+
+
+def test_concurrent_claims_of_a_task(backend):
+    schedule = _append_due(backend)
+    barrier = threading.Barrier(8)
+    claimed = []
+
+    def claim():
+        barrier.wait()
+        claimed.append(backend.claim_task(schedule.id))
+        _close_connection(backend)
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [c.id for c in claimed if c is not None] == [schedule.id]
+
+
+@pytest.fixture
+def writer_backend(tmp_path):
+    yield from _sqlite(tmp_path, writer_queue_size=100)
+
+
+def _block_writer(backend):
+    # Keeps the writer busy until the returned event is set, so the writes
+    # submitted meanwhile are queued and committed as one group.
+    started = threading.Event()
+    release = threading.Event()
+
+    def wait():
+        started.set()
+        release.wait()
+
+    thread = threading.Thread(target=backend._write, args=(wait,))
+    thread.start()
+    started.wait()
+
+    return release, thread
+
+
+def _submit_all(calls):
+    results = [None] * len(calls)
+
+    def run(index, f, args):
+        try:
+            results[index] = f(*args)
+        except Exception as e:
+            results[index] = e
+
+    threads = [
+        threading.Thread(target=run, args=(index, f, args))
+        for index, (f, args) in enumerate(calls)
+    ]
+    for thread in threads:
+        thread.start()
+
+    return results, threads
+
+
+def _wait_queued(backend, size):
+    while backend._writer.queue.qsize() < size:
+        time.sleep(0.01)
+
+
+def test_writer_commits_groups(writer_backend, monkeypatch):
+    from flask_taskx.sql import sqlite
+
+    groups = []
+    commit = sqlite._Writer._commit
+
+    def record(writer, batch):
+        groups.append(len(batch))
+        commit(writer, batch)
+
+    monkeypatch.setattr(sqlite._Writer, "_commit", record)
+    release, blocker = _block_writer(writer_backend)
+
+    results, threads = _submit_all(
+        [(writer_backend.append_task, ("task", {"n": n})) for n in range(20)]
+    )
+    _wait_queued(writer_backend, 20)
+    release.set()
+    for thread in threads + [blocker]:
+        thread.join()
+
+    assert groups[-1] == 20
+    assert sorted(schedule.payload["n"] for schedule in results) == list(range(20))
+    assert len({schedule.id for schedule in results}) == 20
+
+
+def test_writer_isolates_failing_writes(writer_backend):
+    def fail():
+        writer_backend.Schedule.create(automation="failed")
+        raise RuntimeError("write failed")
+
+    release, blocker = _block_writer(writer_backend)
+    results, threads = _submit_all(
+        [
+            (writer_backend.append_task, ("task", {"n": 1})),
+            (writer_backend.append_task, ("task", {"n": object()})),
+            (writer_backend._write, (fail,)),
+            (writer_backend.append_task, ("task", {"n": 2})),
+        ]
+    )
+    _wait_queued(writer_backend, 4)
+    release.set()
+    for thread in threads + [blocker]:
+        thread.join()
+
+    assert results[0].payload == {"n": 1}
+    assert isinstance(results[1], Exception)
+    assert isinstance(results[2], RuntimeError)
+    assert results[3].payload == {"n": 2}
+    assert sorted(writer_backend.pop_task().payload["n"] for _ in range(2)) == [1, 2]
+    assert writer_backend.pop_task() is None
+
+
+def test_writer_queue_backpressure(tmp_path, monkeypatch):
+    from flask_taskx.sql import sqlite
+
+    monkeypatch.setattr(sqlite, "WRITER_TIMEOUT", 0.1)
+    backend = next(_sqlite(tmp_path, writer_queue_size=1))
+    release, blocker = _block_writer(backend)
+
+    results, threads = _submit_all([(backend.append_task, ("task", None))])
+    _wait_queued(backend, 1)
+
+    with pytest.raises(sqlite.WriterQueueFullException):
+        backend.append_task("task", None)
+
+    release.set()
+    for thread in threads + [blocker]:
+        thread.join()
+
+    assert results[0].automation == "task"
+    backend.close()
+
+
+def test_writer_commit_timeout_drops_the_write(writer_backend, monkeypatch):
+    from flask_taskx.sql import sqlite
+
+    schedule = writer_backend.append_task("task", None)
+    release, blocker = _block_writer(writer_backend)
+    monkeypatch.setattr(sqlite, "WRITER_COMMIT_TIMEOUT", 0.1)
+
+    with pytest.raises(sqlite.WriterTimeoutException):
+        writer_backend.append_task("task", None)
+
+    with pytest.raises(sqlite.WriterTimeoutException):
+        writer_backend.pop_task()
+
+    release.set()
+    blocker.join()
+
+    # The claim given up on was not committed, the task is still pending.
+    assert writer_backend.pop_task().id == schedule.id
+    assert writer_backend.pop_task() is None
+
+
+def test_writer_commit_timeout_waits_for_started_writes(writer_backend, monkeypatch):
+    from flask_taskx.sql import sqlite
+
+    monkeypatch.setattr(sqlite, "WRITER_COMMIT_TIMEOUT", 0.1)
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(0.3)
+        return "done"
+
+    results, threads = _submit_all([(writer_backend._write, (slow,))])
+    started.wait()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["done"]
+
+
+def test_writer_restarts_after_fork(writer_backend):
+    writer = writer_backend._writer
+    writer_backend._writer_pid = -1
+
+    schedule = writer_backend.append_task("task", None)
+
+    assert writer_backend._writer is not writer
+    assert writer_backend._writer_pid == os.getpid()
+    assert writer_backend.pop_task().id == schedule.id
+    writer.close()
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_writer_restarts_after_stopping(writer_backend, monkeypatch):
+    from flask_taskx.sql import sqlite
+
+    def crash(writer, batch):
+        raise RuntimeError("writer crashed")
+
+    writer = writer_backend._writer
+    release, blocker = _block_writer(writer_backend)
+    results, threads = _submit_all([(writer_backend.append_task, ("task", None))] * 2)
+    _wait_queued(writer_backend, 2)
+    monkeypatch.setattr(sqlite._Writer, "_commit", crash)
+    release.set()
+    for thread in threads + [blocker]:
+        thread.join()
+    writer.join()
+    monkeypatch.undo()
+
+    assert all(isinstance(result, sqlite.WriterStoppedException) for result in results)
+
+    schedule = writer_backend.append_task("task", None)
+
+    assert writer_backend._writer is not writer
+    assert writer_backend.pop_task().id == schedule.id
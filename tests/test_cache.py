@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import time
+
+from flask_taskx import cache
+from flask_taskx.cache import ResultCache, cache_key
+
+
+def test_cache_key_ignores_payload_order():
+    assert cache_key("task", {"a": 1, "b": 2}) == cache_key("task", {"b": 2, "a": 1})
+    assert cache_key("task", {"a": 1}) != cache_key("other", {"a": 1})
+    assert cache_key("task", {"a": 1}) != cache_key("task", {"a": 2})
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    results = ResultCache(1024)
+
+    results.set("key", {"value": 1}, 10)
+    assert results.get("key") == (True, {"value": 1})
+
+    now[0] += 10
+    assert results.get("key") == (False, None)
+    assert results._size == 0
+
+
+def test_least_recently_used_entries_are_evicted_by_size():
+    results = ResultCache(10)
+    results.set("a", "1234", 60)  # 6 bytes once JSON encoded
+    results.set("b", "12", 60)  # 4 bytes
+
+    results.get("a")
+    results.set("c", "", 60)  # 2 bytes, over the limit
+
+    assert results.get("a") == (True, "1234")
+    assert results.get("b") == (False, None)
+    assert results.get("c") == (True, "")
+
+
+def test_outputs_larger_than_the_cache_are_not_kept():
+    results = ResultCache(4)
+    results.set("key", "12345", 60)
+
+    assert results.get("key") == (False, None)
+
+
+def test_hit_skips_the_function_call(worker):
+    calls = []
+
+    @worker.define_task(cache_ttl=60)
+    def task(value):
+        calls.append(value)
+        return value * 2
+
+    for value in (1, 1, 2):
+        task.apply({"value": value})
+        worker.task_executor()
+
+    Schedule = worker._db.Schedule
+    assert calls == [1, 2]
+    assert [s.output for s in Schedule.select().order_by(Schedule.id)] == [2, 2, 4]
+
+
+def test_tasks_without_ttl_are_not_cached(worker):
+    calls = []
+
+    @worker.define_task
+    def task(value):
+        calls.append(value)
+
+    for _ in range(2):
+        task.apply({"value": 1})
+        worker.task_executor()
+
+    assert calls == [1, 1]
+
+
+def test_database_lookup_keeps_the_remaining_ttl(worker):
+    worker.set_cache("database", worker.config["TASKER_CACHE_SIZE"])
+    key = cache_key("task", {"value": 1})
+    worker._db.append_task("task", {"value": 1})
+    schedule = worker._db.pop_task()
+    schedule.cache_key = key
+    worker._db.complete_task(schedule, 2)
+
+    # Computed 40 seconds ago by another worker.
+    completion_date = datetime.datetime.utcnow() - datetime.timedelta(seconds=40)
+    Schedule = worker._db.Schedule
+    Schedule.update(completion_date=completion_date).execute()
+
+    assert worker._cache_lookup(key, 60) == (True, 2)
+
+    expires_at = worker._result_cache()._entries[key][0]
+    assert 19 < expires_at - time.monotonic() <= 20
+
+    worker._result_cache().clear()
+    assert worker._cache_lookup(key, 30) == (False, None)
+
+
+def test_memory_cache_does_not_query_the_database(worker, monkeypatch):
+    def fail(*args):
+        raise AssertionError("database lookup")
+
+    monkeypatch.setattr(worker._db, "get_cached_task", fail)
+
+    assert worker._cache_lookup(cache_key("task", {}), 60) == (False, None)
+
+
+def test_database_cache_hits_do_not_extend_the_ttl(worker):
+    calls = []
+
+    @worker.define_task(cache_ttl=0.5)
+    def task(value):
+        calls.append(value)
+        return value
+
+    worker.set_cache("database", worker.config["TASKER_CACHE_SIZE"])
+
+    for _ in range(3):
+        # Lookups go to the tasks table, as they would from another worker.
+        worker._result_cache().clear()
+        task.apply({"value": 1})
+        worker.task_executor()
+        time.sleep(0.3)
+
+    Schedule = worker._db.Schedule
+    schedules = list(Schedule.select().order_by(Schedule.id))
+
+    assert calls == [1, 1]
+    assert [schedule.output for schedule in schedules] == [1, 1, 1]
+    assert [schedule.cache_key is not None for schedule in schedules] == [
+        True,
+        False,
+        True,
+    ]
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+import subprocess
+import sys
+
+# Same statement and budget as ``make importtime``.
+IMPORT_STATEMENT = (
+    "from flask_taskx import BaseTaskWorker; import flask_taskx.sql.sqlite"
+)
+IMPORT_BUDGET_US = 100000
+
+
+def _import_time():
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_STATEMENT],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+
+    total = 0
+    started = False
+
+    for line in output.splitlines():
+        _, cumulative, package = line.split("|")
+
+        started = started or package.startswith(" flask_taskx")
+
+        # Only top level imports, their cumulative time covers nested ones.
+        if started and not package.startswith("  "):
+            total += int(cumulative)
+
+    return total
+
+
+def test_import_time_budget():
+    # The fastest of a few fresh interpreters, a single run is too noisy.
+    total = min(_import_time() for _ in range(3))
+
+    assert total <= IMPORT_BUDGET_US, "flask_taskx import took {} us".format(total)
+
+
+def test_cache_is_imported_lazily():
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys; from flask_taskx import BaseTaskWorker; "
+            "print('flask_taskx.cache' in sys.modules)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+    assert output.strip() == "False"
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+from flask_taskx.sql import sqlite
+
+# The queue table as created before the tracing columns were added.
+BASELINE_TABLE = (
+    'CREATE TABLE "flask_tasker_schedule" ('
+    '"id" INTEGER NOT NULL PRIMARY KEY, '
+    '"automation" VARCHAR(255) NOT NULL, '
+    '"scheduled_date" DATETIME NOT NULL, '
+    '"completion_date" DATETIME NOT NULL, '
+    '"payload" TEXT NOT NULL, '
+    '"output" TEXT NOT NULL, '
+    '"busy" INTEGER NOT NULL, '
+    '"done" INTEGER NOT NULL, '
+    '"retries" INTEGER NOT NULL, '
+    '"fail_message" TEXT NOT NULL)'
+)
+
+
+def test_create_tables_upgrades_baseline_table(tmp_path):
+    database = sqlite.connect("sqlite:///{}".format(tmp_path / "tasks.db"))
+    database.execute_sql(BASELINE_TABLE)
+    database.execute_sql(
+        "INSERT INTO flask_tasker_schedule VALUES "
+        "(1, 'task', '2020-01-01 00:00:00', '2020-01-01 00:00:00', "
+        "'{\"a\": 1}', 'null', 0, 0, 0, 'null')"
+    )
+
+    backend = sqlite.backend_class(database)
+    backend.create_tables()
+    backend.create_tables()
+
+    columns = {
+        column.name: column
+        for column in database.get_columns(backend.Schedule._meta.table_name)
+    }
+    assert {"claimed_at", "started_at", "finished_at", "profile", "cache_key"} <= set(
+        columns
+    )
+    assert columns["completion_date"].null
+
+    schedule = backend.pop_task()
+    assert schedule.payload == {"a": 1}
+    assert schedule.claimed_at is not None
+    backend.complete_task(schedule, 1)
+
+    backend.append_task("task", None)
+    schedule = backend.pop_task()
+    assert schedule.payload is None
+
+    database.close()
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+
+import pytest
+from flask import abort
+
+from flask_taskx import BlockingTaskWorker
+
+
+def _enqueued(worker):
+    Schedule = worker._db.Schedule
+
+    return [schedule.payload for schedule in Schedule.select().order_by(Schedule.id)]
+
+
+@pytest.fixture
+def task(worker):
+    @worker.define_task
+    def echo(**kwargs):
+        return kwargs
+
+    return echo
+
+
+def test_outbox_enqueues_on_exit(worker, task):
+    with worker.outbox():
+        task.apply({"n": 1})
+        task.apply({"n": 2})
+        assert _enqueued(worker) == []
+
+    assert _enqueued(worker) == [{"n": 1}, {"n": 2}]
+
+
+def test_outbox_discards_on_exception(worker, task):
+    with pytest.raises(RuntimeError):
+        with worker.outbox():
+            task.apply({"n": 1})
+            raise RuntimeError
+
+    assert _enqueued(worker) == []
+
+    task.apply({"n": 2})
+    assert _enqueued(worker) == [{"n": 2}]
+
+
+def test_nested_outbox_joins_outer_one(worker, task):
+    with worker.outbox():
+        with worker.outbox():
+            task.apply({"n": 1})
+
+        assert _enqueued(worker) == []
+        task.apply({"n": 2})
+
+    assert _enqueued(worker) == [{"n": 1}, {"n": 2}]
+
+
+def test_outbox_tracks_delayed_tasks(worker, task):
+    worker.register_task()
+
+    with worker.outbox():
+        task.apply({"n": 1})
+        task.apply_in(1, {"n": 2})
+
+    schedules = list(worker._db.Schedule.select().order_by(worker._db.Schedule.id))
+    assert list(worker._timers) == [schedules[1].id]
+
+
+def test_request_outbox(app):
+    app.config["TASKER_ENQUEUE_MODE"] = "request"
+    worker = BlockingTaskWorker()
+    worker.init_app(app)
+    worker.create_tables()
+    worker.register_task()
+
+    @worker.define_task
+    def echo(**kwargs):
+        return kwargs
+
+    @app.route("/ok")
+    def ok():
+        echo.apply({"n": 1})
+        echo.apply_at(
+            datetime.datetime.utcnow() + datetime.timedelta(seconds=1), {"n": 2}
+        )
+        assert _enqueued(worker) == []
+        return ""
+
+    @app.route("/fail")
+    def fail():
+        echo.apply({"n": 3})
+        raise RuntimeError
+
+    @app.route("/conflict")
+    def conflict():
+        echo.apply({"n": 4})
+        abort(409)
+
+    @app.route("/handled")
+    def handled():
+        echo.apply({"n": 5})
+        raise KeyError
+
+    @app.errorhandler(KeyError)
+    def rollback(e):
+        return "rolled back", 500
+
+    @app.route("/redirect")
+    def redirect():
+        echo.apply({"n": 6})
+        return "", 302
+
+    client = app.test_client()
+    assert client.get("/ok").status_code == 200
+    assert client.get("/fail").status_code == 500
+    assert client.get("/conflict").status_code == 409
+    assert client.get("/handled").status_code == 500
+    assert client.get("/redirect").status_code == 302
+
+    assert _enqueued(worker) == [{"n": 1}, {"n": 2}, {"n": 6}]
+    assert len(worker._timers) == 1
+
+    worker._database.close()
+
+
+@pytest.mark.parametrize("writer", [False, True])
+def test_bound_database_joins_caller_transactions(app, writer):
+    from flask_taskx.sql import sqlite
+
+    app.config["TASKER_SQLITE_WRITER"] = writer
+    database = sqlite.connect(app.config["TASKER_DATABASE_URI"])
+    worker = BlockingTaskWorker()
+    worker.set_database(database)
+    worker.init_app(app)
+    worker.create_tables()
+
+    @worker.define_task
+    def echo(**kwargs):
+        return kwargs
+
+    with pytest.raises(RuntimeError):
+        with database.atomic():
+            echo.apply({"n": 1})
+            with worker.outbox():
+                echo.apply({"n": 2})
+            raise RuntimeError
+
+    assert _enqueued(worker) == []
+
+    with database.atomic():
+        echo.apply({"n": 3})
+
+    assert _enqueued(worker) == [{"n": 3}]
+    assert worker._database is database
+
+    worker._db.close()
+    database.close()
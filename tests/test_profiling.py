@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+import tracemalloc
+
+import pytest
+
+from flask_taskx import profiling
+from flask_taskx.profiling import profiled
+
+
+def _overlapping(mode):
+    stats = {}
+    started = threading.Event()
+
+    def run(name, hold):
+        with profiled(mode) as profile:
+            started.set()
+            [bytearray(1024) for _ in range(100)]
+            time.sleep(hold)
+        stats[name] = profile
+
+    first = threading.Thread(target=run, args=("first", 0.05))
+    second = threading.Thread(target=run, args=("second", 0.2))
+    first.start()
+    started.wait()
+    second.start()
+    first.join()
+    second.join()
+
+    return stats
+
+
+def test_overlapping_tracemalloc_profiles():
+    stats = _overlapping(profiling.PROFILE_TRACEMALLOC)
+
+    for profile in stats.values():
+        assert profile["mode"] == profiling.PROFILE_TRACEMALLOC
+        assert "error" not in profile
+        assert profile["entries"]
+
+    assert not tracemalloc.is_tracing()
+
+
+def test_overlapping_cprofile_profiles_skip_the_second():
+    stats = _overlapping(profiling.PROFILE_CPROFILE)
+
+    assert stats["first"]["mode"] == profiling.PROFILE_CPROFILE
+    assert stats["second"] == {}
+
+
+def test_profile_is_collected_when_block_raises():
+    with pytest.raises(ValueError):
+        with profiled(profiling.PROFILE_CPROFILE) as profile:
+            raise ValueError("task failed")
+
+    assert profile["mode"] == profiling.PROFILE_CPROFILE
+
+
+def test_profiler_errors_do_not_propagate(monkeypatch):
+    monkeypatch.setattr(
+        tracemalloc, "take_snapshot", lambda: (_ for _ in ()).throw(RuntimeError("x"))
+    )
+
+    with profiled(profiling.PROFILE_TRACEMALLOC) as profile:
+        pass
+
+    assert profile == {"mode": profiling.PROFILE_TRACEMALLOC, "error": "x"}
+    assert not tracemalloc.is_tracing()
+
+
+def test_profiler_failure_does_not_rerun_task(worker, monkeypatch):
+    calls = []
+
+    @worker.define_task
+    def task(value):
+        calls.append(value)
+        return value
+
+    def broken(limit):
+        raise RuntimeError("Another profiling tool is already active")
+
+    monkeypatch.setattr(profiling, "_start_cprofile", broken)
+    worker.set_profiler(profiling.PROFILE_CPROFILE, 1)
+
+    task.apply({"value": 1})
+    worker.task_executor()
+    worker.task_executor()
+
+    schedule = worker._db.Schedule.get()
+    assert calls == [1]
+    assert schedule.done
+    assert schedule.profile is None
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from flask_taskx import BackgroundTaskWorker
+from flask_taskx.stream import redis as stream
+
+
+@pytest.fixture
+def backend():
+    backend = stream.RedisBackend(fakeredis.FakeRedis(decode_responses=True))
+    backend.create_tables()
+
+    return backend
+
+
+def _append_delayed(backend, count):
+    later = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+    return backend.append_tasks([("task", {"n": n}, later) for n in range(count)])
+
+
+def _make_due(backend):
+    delayed = stream._key("delayed")
+    backend.database.zadd(
+        delayed,
+        {
+            schedule_id: time.time() - 1
+            for schedule_id in backend.database.zrange(delayed, 0, -1)
+        },
+    )
+
+
+def _pending_entries(backend):
+    return backend.database.xpending(stream._key("stream"), stream.group)["pending"]
+
+
+def test_due_tasks_are_promoted_once(backend):
+    _append_delayed(backend, 250)
+    _make_due(backend)
+
+    threads = [
+        threading.Thread(
+            target=lambda: [backend._promote_due_tasks() for _ in range(3)]
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert backend.database.xlen(stream._key("stream")) == 250
+    assert backend.database.zcard(stream._key("delayed")) == 0
+    assert backend.database.hlen(stream._key("delayed", "data")) == 0
+
+
+def test_claim_task_waits_for_the_due_date(backend):
+    (schedule,) = _append_delayed(backend, 1)
+
+    assert backend.claim_task(schedule.id) is None
+    assert backend.database.xlen(stream._key("stream")) == 0
+
+
+def test_claimed_timer_task_is_tracked_until_completed(backend):
+    (schedule,) = _append_delayed(backend, 1)
+    _make_due(backend)
+
+    claimed = backend.claim_task(schedule.id)
+
+    assert claimed.id == schedule.id
+    assert backend.claim_task(schedule.id) is None
+    assert _pending_entries(backend) == 1
+    assert backend.queue_stats(datetime.datetime.utcnow())[0][0]["in_flight"] == 1
+
+    backend.complete_task(claimed, None)
+
+    assert _pending_entries(backend) == 0
+    assert backend.queue_stats(datetime.datetime.utcnow())[0][0]["in_flight"] == 0
+
+
+def test_consumer_name_follows_the_process(backend, monkeypatch):
+    monkeypatch.setattr(stream.os, "getpid", lambda: 1001)
+    backend.append_task("task", None)
+    backend.pop_task()
+
+    # A process forked after the import reads under its own name.
+    monkeypatch.setattr(stream.os, "getpid", lambda: 1002)
+    backend.append_task("task", None)
+    backend.pop_task()
+
+    consumers = backend.database.xinfo_consumers(stream._key("stream"), stream.group)
+    assert sorted(c["name"].rsplit("-", 1)[1] for c in consumers) == ["1001", "1002"]
+
+
+def test_running_tasks_are_not_taken_over(backend, monkeypatch):
+    monkeypatch.setattr(stream, "block_time", 10)
+    worker = stream.RedisBackend(backend.database, claim_idle_time=0.3)
+    other = stream.RedisBackend(backend.database, claim_idle_time=0.3)
+    backend.append_task("task", None)
+
+    schedule = worker.pop_task()
+    time.sleep(0.6)
+    monkeypatch.setattr(stream, "consumer", "other")
+
+    assert other.pop_task() is None
+
+    # A consumer that stopped claiming its tasks again is taken over.
+    worker._claimed.clear()
+    time.sleep(0.4)
+
+    reclaimed = other.pop_task()
+    assert reclaimed.id == schedule.id
+    assert reclaimed.message_id == schedule.message_id
+
+
+def test_worker_consumes_tasks_as_they_arrive(monkeypatch):
+    database = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(stream, "connect", lambda database_uri: database)
+    monkeypatch.setattr(stream, "block_time", 100)
+
+    app = Flask(__name__)
+    app.config.update(
+        TASKER_DATABASE_URI="redis://localhost:6379/0",
+        TASKER_DRIVER="redis",
+        TASKER_INTERVAL_TIME=60,
+    )
+    worker = BackgroundTaskWorker()
+    worker.init_app(app)
+    done = []
+
+    @worker.define_task
+    def task(n):
+        done.append(n)
+
+    worker.start()
+    try:
+        for n in range(20):
+            task.apply({"n": n})
+
+        deadline = time.monotonic() + 5
+        while len(done) < 20 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        worker.shutdown()
+
+    assert sorted(done) == list(range(20))
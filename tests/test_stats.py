@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+
+
+def test_delayed_tasks_are_not_pending(worker):
+    now = datetime.datetime.utcnow()
+    worker._db.append_task("task", None, now - datetime.timedelta(seconds=10))
+    worker._db.append_task("task", None, now + datetime.timedelta(hours=1))
+
+    stats = worker.stats()["task"]
+
+    assert stats["pending"] == 1
+    assert stats["delayed"] == 1
+    assert 10 <= stats["oldest_pending_age"] < 60
+
+
+def test_only_delayed_tasks_have_no_pending_age(worker):
+    worker._db.append_task(
+        "task", None, datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+    )
+
+    stats = worker.stats()["task"]
+
+    assert stats["pending"] == 0
+    assert stats["delayed"] == 1
+    assert stats["oldest_pending_age"] is None
+
+
+def test_failure_rate(worker):
+    @worker.define_task
+    def flaky(fail):
+        if fail:
+            raise ValueError("failed")
+
+    def cron():
+        raise ValueError("failed")
+
+    flaky.apply({"fail": False})
+    flaky.apply({"fail": True})
+    for _ in range(2):
+        worker.task_executor()
+    worker.cron_executor(cron)()
+
+    stats = worker.stats()
+
+    assert stats[flaky._name]["failure_rate"] == 0.5
+    assert stats[flaky._name]["pending"] == 1
+    assert stats["cron"]["failure_rate"] == 1.0
+
+
+def test_print_stats(capsys):
+    from flask_taskx.cli import _print_stats
+
+    _print_stats(
+        {
+            "tasks.email": {
+                "pending": 3,
+                "oldest_pending_age": 12.34,
+                "delayed": 1,
+                "in_flight": 2,
+                "failed": 0,
+                "failure_rate": 0.25,
+            },
+            "tasks.idle": {
+                "pending": 0,
+                "oldest_pending_age": None,
+                "delayed": 0,
+                "in_flight": 0,
+                "failed": 1,
+                "failure_rate": 0.0,
+            },
+        }
+    )
+
+    header, email, idle = capsys.readouterr().out.splitlines()
+    assert header.split() == [
+        "TASK",
+        "PENDING",
+        "OLDEST",
+        "(s)",
+        "DELAYED",
+        "IN",
+        "FLIGHT",
+        "FAILED",
+        "FAILURE",
+        "RATE",
+    ]
+    assert email.split() == ["tasks.email", "3", "12.3", "1", "2", "0", "25.0%"]
+    assert idle.split() == ["tasks.idle", "0", "-", "0", "0", "1", "0.0%"]
+
+
+def test_inspect_command(app, worker, monkeypatch):
+    from click.testing import CliRunner
+
+    from flask_taskx import cli
+
+    worker._db.append_task("task", None)
+    monkeypatch.setattr(cli, "_load_task_worker", lambda remote: (app, worker))
+
+    result = CliRunner().invoke(cli.taskx_cli, ["inspect", "--window", "60"])
+
+    assert result.exit_code == 0
+    header, task = result.output.splitlines()
+    assert header.split()[:2] == ["TASK", "PENDING"]
+    assert task.split()[:2] == ["task", "1"]
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+
+import pytest
+
+from flask_taskx.signals import task_failure, task_postrun, task_prerun
+
+
+@pytest.fixture
+def received():
+    received = []
+
+    def receiver(name):
+        def receive(sender, **kwargs):
+            received.append((name, sender, kwargs))
+
+        return receive
+
+    receivers = [
+        (task_prerun, receiver("prerun")),
+        (task_postrun, receiver("postrun")),
+        (task_failure, receiver("failure")),
+    ]
+    for signal, receive in receivers:
+        signal.connect(receive)
+
+    yield received
+
+    for signal, receive in receivers:
+        signal.disconnect(receive)
+
+
+@pytest.fixture
+def tasks(worker):
+    @worker.define_task
+    def add(a, b):
+        return a + b
+
+    @worker.define_task
+    def fail():
+        raise ValueError("failed")
+
+    return add, fail
+
+
+def test_signals_of_a_successful_task(worker, tasks, received):
+    add, _ = tasks
+    add.apply({"a": 1, "b": 2})
+
+    worker.task_executor()
+
+    name = add._name
+    payload = {"a": 1, "b": 2}
+    assert received == [
+        ("prerun", worker, {"task": name, "payload": payload}),
+        ("postrun", worker, {"task": name, "payload": payload, "result": 3}),
+    ]
+
+
+def test_signals_of_a_failed_task(worker, tasks, received):
+    _, fail = tasks
+    fail.apply({})
+
+    worker.task_executor()
+
+    assert [name for name, _, _ in received] == ["prerun", "failure"]
+    _, sender, kwargs = received[1]
+    assert sender is worker
+    assert kwargs["task"] == fail._name
+    assert isinstance(kwargs["exception"], ValueError)
+
+
+def test_timestamps_of_a_successful_task(worker, tasks):
+    add, _ = tasks
+    before = datetime.datetime.utcnow()
+    add.apply({"a": 1, "b": 2})
+
+    worker.task_executor()
+
+    schedule = worker._db.Schedule.get()
+    assert schedule.done
+    assert schedule.output == 3
+    assert (
+        before
+        <= schedule.scheduled_date
+        <= schedule.claimed_at
+        <= schedule.started_at
+        <= schedule.finished_at
+        <= datetime.datetime.utcnow()
+    )
+
+
+def test_timestamps_of_a_failed_task(worker, tasks):
+    _, fail = tasks
+    fail.apply({})
+
+    worker.task_executor()
+
+    schedule = worker._db.Schedule.get()
+    assert not schedule.done
+    assert schedule.retries == 1
+    assert schedule.fail_message == {"message": "failed"}
+    assert schedule.claimed_at <= schedule.started_at <= schedule.finished_at